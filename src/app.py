@@ -14,7 +14,7 @@ from .services.transcription_service import TranscriptionService
 from .services.translation_service import TranslationService
 from .services.subtitle_generator import SubtitleGenerator
 from .services.quality_control import QualityController, QualityFlag
-from .services.retry_manager import RetryManager, RetryConfig, SegmentReprocessor
+from .services.retry_manager import RetryManager, RetryConfig, SegmentReprocessor, QualityCheckError, is_retryable
 from .services.audio_sync_manager import AudioSyncManager
 from .services.word_level_sync import WordLevelSynchronizer
 from .services.advanced_word_processor import AdvancedWordProcessor
@@ -315,8 +315,17 @@ class VideoSubtitleApp:
             if st.session_state.get('enable_audio_sync', True):
                 progress_tracker.update_progress(0.65, "🎵 Analiza cech audio...")
                 
-                # Analizuj cechy audio
-                audio_features = self.audio_sync_manager.analyze_audio_features(audio_path)
+                # Analizuj cechy audio tylko w zakresie napisów (z marginesem na przesunięcie);
+                # menedżer przycina okno do max_analysis_seconds
+                max_offset = self.audio_sync_manager.max_offset_seconds
+                if transcript['segments']:
+                    audio_features = self.audio_sync_manager.analyze_audio_features(
+                        audio_path,
+                        t_start=max(0.0, min(seg['start'] for seg in transcript['segments']) - max_offset),
+                        t_end=max(seg['end'] for seg in transcript['segments']) + max_offset
+                    )
+                else:
+                    audio_features = self.audio_sync_manager.analyze_audio_features(audio_path)
                 
                 progress_tracker.update_progress(0.7, "🔄 Obliczanie korekty synchronizacji...")
                 
@@ -542,38 +551,48 @@ class VideoSubtitleApp:
         """
         retry_count = 0
         last_exception = None
+        delay = self.retry_manager.config.base_delay
+        max_retries = self.retry_manager._max_retries_for(operation_name)
         
-        for attempt in range(self.retry_manager.config.max_retries + 1):
+        for attempt in range(max_retries + 1):
             try:
-                start_time = time.time()
+                start_ns = time.monotonic_ns()
                 result = operation(*args, **kwargs)
-                execution_time = time.time() - start_time
+                end_ns = time.monotonic_ns()
+                execution_ns = end_ns - start_ns
                 
                 # Sprawdź jakość wyniku
                 if self.retry_manager._validate_result_quality(result, operation_name):
                     logger.info(f"{operation_name} zakończona pomyślnie po {attempt + 1} próbach")
-                    self.retry_manager._record_successful_attempt(operation_name, execution_time, retry_count)
+                    self.retry_manager._record_successful_attempt(operation_name, execution_ns, retry_count, end_ns)
                     return result, retry_count
                 else:
-                    raise Exception(f"Wynik operacji {operation_name} nie spełnia kryteriów jakości")
+                    raise QualityCheckError(f"Wynik operacji {operation_name} nie spełnia kryteriów jakości")
                     
             except Exception as e:
                 last_exception = e
                 retry_count += 1
+                self.retry_manager._note_failure(operation_name, e)
                 
                 logger.warning(f"{operation_name} - próba {attempt + 1} nieudana: {str(e)}")
                 
-                if attempt < self.retry_manager.config.max_retries:
-                    delay = self.retry_manager._calculate_retry_delay(attempt)
-                    logger.info(f"Ponowna próba za {delay:.1f} sekund...")
-                    
-                    self.retry_manager._record_failed_attempt(operation_name, str(e), attempt + 1)
-                    time.sleep(delay)
-                else:
+                if not is_retryable(e):
+                    logger.error(f"{operation_name} - błąd niepodlegający ponowieniu")
+                    break
+                
+                # Ostatnia próba - bez liczenia opóźnienia, od razu do zapisu porażki
+                if attempt >= max_retries:
                     logger.error(f"{operation_name} - wszystkie próby wyczerpane")
+                    break
+                
+                delay = self.retry_manager._calculate_retry_delay(delay, operation_name)
+                logger.info(f"Ponowna próba za {delay:.1f} sekund...")
+                
+                self.retry_manager._record_failed_attempt(operation_name, str(e), attempt + 1, start_ns)
+                time.sleep(delay)
         
         # Wszystkie próby nieudane
-        self.retry_manager._record_final_failure(operation_name, str(last_exception), retry_count)
+        self.retry_manager._record_final_failure(operation_name, str(last_exception), retry_count, start_ns)
         raise Exception(f"Operacja {operation_name} nieudana po {retry_count} próbach: {last_exception}")
     
     def _reprocess_segments_sync(self, segments: List[Dict], confidence_threshold: float = 0.6) -> List[Dict]:
@@ -598,13 +617,18 @@ class VideoSubtitleApp:
                 try:
                     # Ponowne tłumaczenie
                     original_text = segment.get('original_text', segment.get('text', ''))
+                    target_language = segment.get('target_language', 'PL')
                     if original_text:
-                        retranslated, _ = self._execute_with_retry_sync(
-                            self.translation_service.translate_text,
-                            "segment_retranslation",
-                            original_text,
-                            target_language=segment.get('target_language', 'PL')
-                        )
+                        # Powtarzające się kwestie tłumaczone są tylko raz
+                        retranslated = self.segment_reprocessor.get_cached_translation(original_text, target_language)
+                        if retranslated is None:
+                            retranslated, _ = self._execute_with_retry_sync(
+                                self.translation_service.translate_text,
+                                "segment_retranslation",
+                                original_text,
+                                target_language=target_language
+                            )
+                            self.segment_reprocessor.cache_translation(original_text, target_language, retranslated)
                         
                         segment['text'] = retranslated
                         segment['reprocessed'] = True
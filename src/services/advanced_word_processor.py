@@ -12,16 +12,63 @@ Implementuje wszystkie wymagane funkcje:
 import numpy as np
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass, field
+from collections import Counter
 import re
 from scipy import signal
 from scipy.signal import correlate
 import logging
 
+from ..utils.jit import njit
 from ..utils.logger import get_logger
 from .word_level_sync import WordTiming, WordLevelSegment
 
 logger = get_logger(__name__)
 
+@njit(cache=True)
+def _fix_overlaps_kernel(starts: np.ndarray, ends: np.ndarray, durations: np.ndarray,
+                         min_word_gap: float) -> int:
+    """
+    Napraw nakładania słów jednym liniowym przebiegiem (w miejscu)
+    
+    Każde słowo zależy od poprzedniego, już poprawionego - pętla sekwencyjna w kodzie JIT.
+    
+    Args:
+        starts: Początki słów (modyfikowane)
+        ends: Końce słów (modyfikowane)
+        durations: Długości słów (modyfikowane dla przesuniętych słów)
+        min_word_gap: Minimalna przerwa między słowami
+        
+    Returns:
+        Liczba naprawionych nakładań
+    """
+    overlaps_fixed = 0
+    
+    for i in range(1, starts.shape[0]):
+        prev_start = starts[i - 1]
+        prev_end = ends[i - 1]
+        start = starts[i]
+        end = ends[i]
+        
+        if start < prev_end:
+            overlap_duration = prev_end - start
+            
+            if overlap_duration <= 0.050:  # Małe nakładanie - przesuń start
+                pass
+            elif overlap_duration <= 0.200:  # Średnie - podziel nakładanie między słowa
+                prev_end -= overlap_duration / 2
+            else:  # Duże - zachowaj proporcje
+                total_duration = end - prev_start
+                prev_duration = prev_end - prev_start
+                prev_duration_ratio = prev_duration / (overlap_duration + prev_duration + (end - start))
+                prev_end = prev_start + (total_duration * prev_duration_ratio)
+            
+            ends[i - 1] = prev_end
+            starts[i] = prev_end + min_word_gap
+            durations[i] = end - starts[i]
+            overlaps_fixed += 1
+    
+    return overlaps_fixed
+
 @dataclass
 class AudioEnergyProfile:
     """Profil energii audio dla korekty offsetu"""
@@ -161,61 +208,28 @@ class AdvancedWordProcessor:
         if len(words) <= 1:
             return words
         
-        fixed_words = []
-        overlaps_fixed = 0
+        n = len(words)
+        starts = np.fromiter((w.start for w in words), dtype=np.float64, count=n)
+        ends = np.fromiter((w.end for w in words), dtype=np.float64, count=n)
+        durations = np.fromiter((w.duration for w in words), dtype=np.float64, count=n)
         
-        for i, word in enumerate(words):
-            current_word = WordTiming(
+        # Strategia naprawy zależna od wielkości nakładania (≤50ms, ≤200ms, większe) - kernel JIT
+        overlaps_fixed = _fix_overlaps_kernel(starts, ends, durations, self.min_word_gap)
+        
+        fixed_words = [
+            WordTiming(
                 word=word.word,
-                start=word.start,
-                end=word.end,
+                start=start,
+                end=end,
                 confidence=word.confidence,
                 speaker=word.speaker,
                 word_index=word.word_index,
-                duration=word.duration,
+                duration=duration,
                 is_punctuated=word.is_punctuated,
                 is_estimated=word.is_estimated
             )
-            
-            # Sprawdź nakładanie z poprzednim słowem
-            if i > 0:
-                prev_word = fixed_words[-1]
-                
-                if current_word.start < prev_word.end:
-                    # NAKŁADANIE WYKRYTE
-                    overlap_duration = prev_word.end - current_word.start
-                    
-                    # Strategia naprawy zależna od wielkości nakładania
-                    if overlap_duration <= 0.050:  # Małe nakładanie (≤50ms)
-                        # Przesuń start aktualnego słowa
-                        current_word.start = prev_word.end + self.min_word_gap
-                        current_word.duration = current_word.end - current_word.start
-                        
-                    elif overlap_duration <= 0.200:  # Średnie nakładanie (≤200ms)
-                        # Podziel nakładanie między słowa
-                        overlap_split = overlap_duration / 2
-                        prev_word.end -= overlap_split
-                        current_word.start = prev_word.end + self.min_word_gap
-                        
-                        # Aktualizuj poprzednie słowo w liście
-                        fixed_words[-1] = prev_word
-                        current_word.duration = current_word.end - current_word.start
-                        
-                    else:  # Duże nakładanie (>200ms)
-                        # Radykalna korekta - zachowaj proporcje
-                        total_duration = current_word.end - prev_word.start
-                        prev_duration_ratio = (prev_word.end - prev_word.start) / (overlap_duration + (prev_word.end - prev_word.start) + (current_word.end - current_word.start))
-                        
-                        prev_word.end = prev_word.start + (total_duration * prev_duration_ratio)
-                        current_word.start = prev_word.end + self.min_word_gap
-                        
-                        # Aktualizuj poprzednie słowo
-                        fixed_words[-1] = prev_word
-                        current_word.duration = current_word.end - current_word.start
-                    
-                    overlaps_fixed += 1
-            
-            fixed_words.append(current_word)
+            for word, start, end, duration in zip(words, starts.tolist(), ends.tolist(), durations.tolist())
+        ]
         
         logger.info(f"🔧 Naprawiono {overlaps_fixed} nakładających się segmentów")
         return fixed_words
@@ -449,60 +463,56 @@ class AdvancedWordProcessor:
     def _stabilize_blocks_with_overlap(self, words: List[WordTiming]) -> List[StabilizedBlock]:
         """
         Stabilizuj bloki (38 słów) z nakładaniem między blokami (100ms)
+        
+        Granice i timing bloków liczone są wektorowo na tablicach NumPy (SoA),
+        obiekty StabilizedBlock tworzone są dopiero na końcu (N/38 instancji).
         """
         if not words:
             return []
         
-        blocks = []
-        block_id = 0
+        n = len(words)
+        step = self.words_per_block
+        overlap = self.block_overlap
         
-        # Podziel słowa na bloki po 38 słów
-        for i in range(0, len(words), self.words_per_block):
-            block_words = words[i:i + self.words_per_block]
-            
-            if not block_words:
-                continue
-            
-            # Podstawowy timing bloku
-            block_start = block_words[0].start
-            block_end = block_words[-1].end
-            
-            # Oblicz timing wyświetlania z nakładaniem
-            display_start = block_start
-            display_end = block_end
-            
-            # Nakładanie z poprzednim blokiem
-            if blocks:
-                prev_block = blocks[-1]
-                overlap_start = max(block_start - self.block_overlap, prev_block.display_start)
-                display_start = overlap_start
-                
-                # Aktualizuj poprzedni blok żeby nakładał się z tym
-                prev_block.display_end = min(prev_block.display_end + self.block_overlap, block_start + self.block_overlap)
-            
-            # Nakładanie z następnym blokiem (będzie zaktualizowane później)
-            if i + self.words_per_block < len(words):
-                display_end += self.block_overlap
+        # Jednorazowa konwersja słów do tablic (SoA)
+        starts = np.fromiter((w.start for w in words), dtype=np.float64, count=n)
+        ends = np.fromiter((w.end for w in words), dtype=np.float64, count=n)
+        confidences = np.fromiter((w.confidence for w in words), dtype=np.float64, count=n)
+        
+        # Granice bloków po 38 słów
+        block_bounds = np.arange(0, n, step)
+        block_starts = starts[block_bounds]
+        block_ends = ends[np.minimum(block_bounds + step, n) - 1]
+        block_sizes = np.diff(np.append(block_bounds, n))
+        avg_confidences = np.add.reduceat(confidences, block_bounds) / block_sizes
+        
+        # Nakładanie z poprzednim blokiem: start wyświetlania nigdy nie cofa się
+        # przed start poprzedniego bloku (narastające maksimum)
+        display_starts = block_starts - overlap
+        display_starts[0] = block_starts[0]
+        display_starts = np.maximum.accumulate(display_starts)
+        
+        # Nakładanie z następnym blokiem (ostatni blok bez nakładania)
+        display_ends = block_ends.copy()
+        display_ends[:-1] = np.minimum(block_ends[:-1] + 2 * overlap, block_starts[1:] + overlap)
+        
+        blocks = []
+        for block_id, (i, size) in enumerate(zip(block_bounds.tolist(), block_sizes.tolist())):
+            block_words = words[i:i + size]
             
-            # Oblicz średnią pewność i dominującego mówiącego
-            confidences = [w.confidence for w in block_words]
-            speakers = [w.speaker for w in block_words]
-            avg_confidence = np.mean(confidences)
-            dominant_speaker = max(set(speakers), key=speakers.count)
+            # Dominujący mówiący w bloku
+            dominant_speaker = Counter(w.speaker for w in block_words).most_common(1)[0][0]
             
-            block = StabilizedBlock(
+            blocks.append(StabilizedBlock(
                 block_id=block_id,
                 words=block_words,
-                start_time=block_start,
-                end_time=block_end,
-                display_start=display_start,
-                display_end=display_end,
+                start_time=float(block_starts[block_id]),
+                end_time=float(block_ends[block_id]),
+                display_start=float(display_starts[block_id]),
+                display_end=float(display_ends[block_id]),
                 speaker=dominant_speaker,
-                confidence=avg_confidence
-            )
-            
-            blocks.append(block)
-            block_id += 1
+                confidence=float(avg_confidences[block_id])
+            ))
         
         logger.info(f"📦 Utworzono {len(blocks)} stabilizowanych bloków z nakładaniem {self.block_overlap*1000:.0f}ms")
         return blocks
@@ -3,13 +3,23 @@ Menedżer synchronizacji audio-napisy
 Zapewnia precyzyjną synchronizację czasową między dźwiękiem a napisami
 """
 
+import os
+import hashlib
+import mmap
+import wave
+from pathlib import Path
 import numpy as np
 import librosa
-import scipy.signal
-from typing import Dict, Any, List, Tuple, Optional
+from scipy.signal import find_peaks, fftconvolve
+from typing import Dict, Any, List, Tuple, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
 import time
-from dataclasses import dataclass
+import weakref
+from dataclasses import dataclass, field
+from functools import cached_property, partial
 
+from .segment_batch import SegmentBatch
+from ..utils.jit import njit
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,15 +32,276 @@ class SyncCorrection:
     method: str
     segments_adjusted: int
 
-@dataclass
+def _mean_std(values: np.ndarray) -> Tuple[float, float]:
+    """
+    Średnia i odchylenie standardowe w jednym przebiegu (suma i suma kwadratów)
+    
+    Args:
+        values: Tablica wartości
+        
+    Returns:
+        Tuple (mean, std)
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    
+    mean = float(values.sum(dtype=np.float64)) / n
+    mean_sq = float(np.einsum('i,i->', values, values, dtype=np.float64)) / n
+    return mean, max(mean_sq - mean * mean, 0.0) ** 0.5
+
+@dataclass(eq=False)
 class AudioFeatures:
-    """Cechy audio do synchronizacji"""
+    """Cechy audio do synchronizacji (porównywane i haszowane po tożsamości obiektu)"""
     energy_profile: np.ndarray
     spectral_centroids: np.ndarray
     zero_crossing_rate: np.ndarray
     tempo: float
     beat_frames: np.ndarray
     sample_rate: int
+    time_offset: float = 0.0  # Czas (s) pierwszej ramki względem początku pliku
+    is_fallback: bool = False  # Cechy zastępcze - brak danych do synchronizacji
+    hop_length: int = 512  # Faktyczny hop użyty przy analizie
+    energy_mean: float = field(init=False)
+    energy_std: float = field(init=False)
+    
+    def __post_init__(self):
+        self.energy_mean, self.energy_std = _mean_std(self.energy_profile)
+    
+    @property
+    def frame_to_sec(self) -> float:
+        """Przelicznik ramka -> sekundy"""
+        return self.hop_length / self.sample_rate
+    
+    @cached_property
+    def frame_times(self) -> np.ndarray:
+        """Czasy wszystkich ramek (s) - liczone raz na obiekt cech"""
+        times = np.arange(len(self.energy_profile), dtype=np.float32)
+        np.multiply(times, self.frame_to_sec, out=times)
+        times += self.time_offset
+        return times
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    """Oznacz tablicę jako tylko do odczytu (bezpieczne współdzielenie)"""
+    array.setflags(write=False)
+    return array
+
+# Stałe cechy zastępcze współdzielone przez wszystkie wywołania (tylko do odczytu)
+_FALLBACK_FRAMES = 100
+_FALLBACK_ENERGY = _readonly(np.zeros(_FALLBACK_FRAMES, dtype=np.float32))
+_FALLBACK_CENTROIDS = _readonly(np.zeros(_FALLBACK_FRAMES, dtype=np.float32))
+_FALLBACK_ZCR = _readonly(np.zeros(_FALLBACK_FRAMES, dtype=np.float32))
+_FALLBACK_BEATS = _readonly(np.zeros(0, dtype=np.int64))
+
+# Górna granica długości sekwencji DTW - librosa alokuje pełną macierz kosztów n x n
+# (band_rad jej nie zmniejsza), więc dłuższe okna dostają rzadszą siatkę
+_DTW_MAX_BINS = 1000
+
+# Pliki inne niż PCM WAV hashowane są w całości do tej wielkości - powyżej tylko
+# początek i koniec (okno analizy wymagałoby dekodowania, żeby znaleźć jego bajty)
+_FULL_HASH_MAX_BYTES = 4 * 1024 ** 3
+_EDGE_HASH_BYTES = 1024 * 1024
+
+@njit(cache=True)
+def _coverage(starts: np.ndarray, ends: np.ndarray,
+              speech_starts: np.ndarray, speech_ends: np.ndarray) -> np.ndarray:
+    """
+    Oblicz pokrycie każdego przedziału przez posortowane, rozłączne segmenty mowy
+    
+    Pierwszy segment mowy kończący się po początku przedziału znajdowany jest
+    wyszukiwaniem binarnym, dalej sumowane są kolejne segmenty aż do końca przedziału.
+    
+    Args:
+        starts: Początki przedziałów
+        ends: Końce przedziałów
+        speech_starts: Początki segmentów mowy (posortowane, rozłączne)
+        speech_ends: Końce segmentów mowy
+        
+    Returns:
+        Tablica pokrycia (w sekundach) dla każdego przedziału
+    """
+    n = starts.shape[0]
+    m = speech_starts.shape[0]
+    coverage = np.zeros(n)
+    
+    for i in range(n):
+        start = starts[i]
+        end = ends[i]
+        k = np.searchsorted(speech_ends, start, side='right')
+        total = 0.0
+        while k < m and speech_starts[k] < end:
+            overlap = min(end, speech_ends[k]) - max(start, speech_starts[k])
+            if overlap > 0:
+                total += overlap
+            k += 1
+        coverage[i] = total
+    
+    return coverage
+
+def _xcorr_at_lags(a: np.ndarray, b: np.ndarray, max_lag_bins: int) -> np.ndarray:
+    """
+    Korelacja wzajemna przez FFT odczytana dla przesunięć -max_lag_bins..max_lag_bins
+    
+    Wartość dla przesunięcia k to sum_i a[i + k] * b[i]; przesunięcia poza zakresem dają 0.
+    
+    Args:
+        a: Sygnał referencyjny (audio)
+        b: Sygnał przesuwany (transkrypcja)
+        max_lag_bins: Maksymalne przesunięcie w przedziałach
+        
+    Returns:
+        Tablica długości 2 * max_lag_bins + 1
+    """
+    correlation = fftconvolve(a, b[::-1], mode='full')
+    lag_idx = np.arange(-max_lag_bins, max_lag_bins + 1) + len(b) - 1
+    in_range = (lag_idx >= 0) & (lag_idx < len(correlation))
+    scores = np.zeros(len(lag_idx), dtype=correlation.dtype)
+    scores[in_range] = correlation[lag_idx[in_range]]
+    return scores
+
+def _pearson_xcorr_at_lags(a: np.ndarray, b: np.ndarray, max_lag_bins: int) -> Optional[np.ndarray]:
+    """
+    Znormalizowana (Pearson) korelacja wzajemna dwóch sygnałów tej samej długości
+    
+    Args:
+        a: Sygnał referencyjny (audio)
+        b: Sygnał przesuwany (transkrypcja)
+        max_lag_bins: Maksymalne przesunięcie w przedziałach
+        
+    Returns:
+        Krzywa korelacji w zakresie [-1, 1] lub None dla sygnału stałego
+    """
+    a_std = np.std(a)
+    b_std = np.std(b)
+    if a_std == 0 or b_std == 0:
+        return None
+    
+    scores = _xcorr_at_lags(a - a.mean(), b - b.mean(), max_lag_bins)
+    scores /= a_std * b_std * len(b)
+    return scores
+
+@njit(cache=True, fastmath=True)
+def _apply_offsets(starts: np.ndarray, ends: np.ndarray, confidences: np.ndarray,
+                   base_offset: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Oblicz adaptacyjne przesunięcia i nowe czasy wszystkich segmentów w jednym przebiegu
+    
+    Nakładanie z poprzednim (już poprawionym) segmentem naprawiane jest w tej samej pętli.
+    
+    Args:
+        starts: Czasy rozpoczęcia segmentów
+        ends: Czasy zakończenia segmentów
+        confidences: Pewność segmentów
+        base_offset: Podstawowe przesunięcie
+        
+    Returns:
+        Tuple (new_starts, new_ends, used_offsets, fallback_mask, overlap_mask)
+    """
+    n = starts.shape[0]
+    new_starts = np.empty(n)
+    new_ends = np.empty(n)
+    used_offsets = np.empty(n)
+    fallback_mask = np.zeros(n, dtype=np.bool_)
+    overlap_mask = np.zeros(n, dtype=np.bool_)
+    
+    for i in range(n):
+        start = starts[i]
+        end = ends[i]
+        duration = end - start
+        
+        # Adaptacyjne przesunięcie: mniejsza korekta dla pierwszego i ostatniego segmentu
+        offset = base_offset
+        if i == 0 or i == n - 1:
+            offset *= 0.7
+        
+        # Krótsze segmenty potrzebują mniejszej korekty
+        if duration < 1.0:
+            offset *= 0.8
+        elif duration > 5.0:
+            offset *= 1.1
+        
+        # Uwzględnij pewność segmentu
+        if confidences[i] < 0.7:
+            offset *= confidences[i]
+        
+        new_start = max(0.0, start + offset)
+        new_end = max(new_start + 0.1, end + offset)
+        
+        # Walidacja: długość zmieniona maksymalnie o 20%, przesunięcie do 3s
+        duration_ratio = (new_end - new_start) / duration if duration > 0 else 1.0
+        valid = (new_end > new_start
+                 and 0.8 <= duration_ratio <= 1.2
+                 and abs(new_start - start) <= 3.0)
+        
+        if not valid:
+            # Korekta prowadzi do nierozsądnych czasów - użyj mniejszej korekty
+            fallback_offset = offset * 0.5
+            new_start = max(0.0, start + fallback_offset)
+            new_end = max(new_start + 0.1, end + fallback_offset)
+            fallback_mask[i] = True
+        
+        # Nakładanie z poprzednim segmentem: 100ms przerwy, minimalna długość 0.5s
+        if i > 0 and new_start < new_ends[i - 1]:
+            new_start = new_ends[i - 1] + 0.1
+            if new_end - new_start < 0.5:
+                new_end = new_start + 0.5
+            overlap_mask[i] = True
+        
+        new_starts[i] = new_start
+        new_ends[i] = new_end
+        used_offsets[i] = offset
+    
+    return new_starts, new_ends, used_offsets, fallback_mask, overlap_mask
+
+@njit(cache=True)
+def _window_bounds(center: float, window: float, frame_to_sec: float,
+                   time_offset: float, n_frames: int) -> Tuple[int, int]:
+    """Zakres ramek [lo, hi) spełniających center - window <= t_i <= center + window"""
+    lo = max(0, int(np.ceil((center - window - time_offset) / frame_to_sec)))
+    hi = min(n_frames, int(np.floor((center + window - time_offset) / frame_to_sec)) + 1)
+    return lo, hi
+
+@njit(cache=True, fastmath=True)
+def _fine_tune_boundaries(energy: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                          frame_to_sec: float, time_offset: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dostrój granice segmentów do ekstremów energii w oknach wyszukiwania
+    
+    Początek przesuwany jest do ramki o najwyższej energii w oknie ±500ms,
+    koniec do ramki o najniższej energii w oknie ±300ms.
+    
+    Args:
+        energy: Profil energii
+        starts: Czasy rozpoczęcia segmentów
+        ends: Czasy zakończenia segmentów
+        frame_to_sec: Przelicznik ramka -> sekundy
+        time_offset: Czas pierwszej ramki (s)
+        
+    Returns:
+        Tuple (new_starts, new_ends)
+    """
+    n = starts.shape[0]
+    n_frames = energy.shape[0]
+    new_starts = starts.copy()
+    new_ends = ends.copy()
+    
+    for i in range(n):
+        # Okna to ciągłe wycinki profilu - argmax/argmin bez pośredniego indeksowania
+        lo, hi = _window_bounds(starts[i], 0.5, frame_to_sec, time_offset, n_frames)
+        if hi > lo:
+            best = lo + np.argmax(energy[lo:hi])
+            new_starts[i] = best * frame_to_sec + time_offset
+        
+        lo, hi = _window_bounds(ends[i], 0.3, frame_to_sec, time_offset, n_frames)
+        if hi > lo:
+            best = lo + np.argmin(energy[lo:hi])
+            new_ends[i] = best * frame_to_sec + time_offset
+        
+        # Upewnij się, że koniec jest po początku
+        if new_ends[i] <= new_starts[i]:
+            new_ends[i] = new_starts[i] + 0.5
+    
+    return new_starts, new_ends
 
 class AudioSyncManager:
     """Menedżer synchronizacji audio-napisy"""
@@ -40,16 +311,32 @@ class AudioSyncManager:
         self.hop_length = 512
         self.frame_length = 2048
         
+        # Cache cech audio na dysku (klucz: hash pliku + parametry analizy)
+        self.feature_cache_dir = Path(os.getenv(
+            'AUDIO_FEATURES_CACHE_DIR',
+            Path.home() / '.cache' / 'vst' / 'audiofeat'
+        ))
+        
         # Parametry synchronizacji - bardziej tolerancyjne
         self.max_offset_seconds = 10.0  # Maksymalne przesunięcie
+        self.max_analysis_seconds = 60.0  # Maksymalna długość dekodowanego okna audio
         self.min_confidence = 0.3       # Minimalna pewność korekty (obniżona)
         
-    def analyze_audio_features(self, audio_path: str) -> AudioFeatures:
+        # Wykryte segmenty mowy per obiekt cech - wpis znika razem z cechami
+        self._speech_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        
+    def analyze_audio_features(self, audio_path: str, t_start: float = 0.0, t_end: float = 60.0) -> AudioFeatures:
         """
         Analizuj cechy audio do synchronizacji
         
+        Dekodowane jest tylko okno [t_start, t_end] - wywołujący podaje zakres napisów
+        z marginesem max_offset_seconds. Okno jest przycinane do max_analysis_seconds
+        od t_start, więc pamięć i czas analizy nie rosną z długością wideo.
+        
         Args:
             audio_path: Ścieżka do pliku audio
+            t_start: Początek analizowanego okna (s)
+            t_end: Koniec analizowanego okna (s)
             
         Returns:
             AudioFeatures object
@@ -62,9 +349,20 @@ class AudioSyncManager:
                 logger.error(f"Plik audio nie istnieje: {audio_path}")
                 return self._create_fallback_features()
             
+            t_start, t_end = self._analysis_window(t_start, t_end)
+            if t_end <= t_start:
+                logger.error(f"Puste okno analizy audio: {t_start:.1f}-{t_end:.1f}s")
+                return self._create_fallback_features()
+            
+            # Trafienie w cache pomija librosę całkowicie
+            cache_path = self._feature_cache_path(audio_path, t_start, t_end)
+            cached_features = self._load_cached_features(cache_path)
+            if cached_features is not None:
+                return cached_features
+            
             try:
                 # Wczytaj audio z obsługą błędów
-                y, sr = librosa.load(audio_path, sr=self.sample_rate, duration=60)  # Maksymalnie 60s dla analizy
+                y, sr = librosa.load(audio_path, sr=self.sample_rate, offset=t_start, duration=t_end - t_start)
                 
                 if len(y) == 0:
                     logger.warning("Plik audio jest pusty")
@@ -76,49 +374,66 @@ class AudioSyncManager:
             
             # Oblicz cechy audio z obsługą błędów
             try:
-                # 1. Profil energii (RMS)
+                n_fft = min(self.frame_length, len(y))
+                hop_length = min(self.hop_length, len(y)//4)
+                
+                # Wspólny spektrogram amplitudowy - jedno STFT dla wszystkich cech widmowych
+                S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+                
+                # 1. Profil energii (RMS) ze spektrogramu
                 energy_profile = librosa.feature.rms(
-                    y=y, 
-                    frame_length=min(self.frame_length, len(y)),
-                    hop_length=min(self.hop_length, len(y)//4)
+                    S=S, 
+                    frame_length=n_fft,
+                    hop_length=hop_length
                 )[0]
                 
                 # 2. Centroidy spektralne (jasność dźwięku)
                 spectral_centroids = librosa.feature.spectral_centroid(
-                    y=y, 
+                    S=S, 
                     sr=sr,
-                    hop_length=min(self.hop_length, len(y)//4)
+                    n_fft=n_fft,
+                    hop_length=hop_length
                 )[0]
                 
-                # 3. Zero crossing rate (przejścia przez zero)
+                # 3. Zero crossing rate (przejścia przez zero) - w dziedzinie czasu
                 zero_crossing_rate = librosa.feature.zero_crossing_rate(
                     y, 
-                    frame_length=min(self.frame_length, len(y)),
-                    hop_length=min(self.hop_length, len(y)//4)
+                    frame_length=n_fft,
+                    hop_length=hop_length
                 )[0]
                 
                 # 4. Tempo i beat tracking (z obsługą błędów)
                 try:
+                    # Obwiednia onsetów z melspektrogramu tego samego STFT
+                    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S**2, sr=sr))
+                    onset_envelope = librosa.onset.onset_strength(S=mel_db, sr=sr, aggregate=np.median)
                     tempo, beat_frames = librosa.beat.beat_track(
-                        y=y, 
+                        onset_envelope=onset_envelope, 
                         sr=sr,
-                        hop_length=min(self.hop_length, len(y)//4)
+                        hop_length=hop_length
                     )
+                    tempo = float(np.atleast_1d(tempo)[0])
                 except:
                     tempo = 120.0
                     beat_frames = np.array([])
                 
-                logger.info(f"Cechy audio: tempo={tempo:.1f} BPM, energia_avg={np.mean(energy_profile):.3f}, ramek={len(energy_profile)}")
-                
-                return AudioFeatures(
-                    energy_profile=energy_profile,
-                    spectral_centroids=spectral_centroids,
-                    zero_crossing_rate=zero_crossing_rate,
+                features = AudioFeatures(
+                    energy_profile=energy_profile.astype(np.float32, copy=False),
+                    spectral_centroids=spectral_centroids.astype(np.float32, copy=False),
+                    zero_crossing_rate=zero_crossing_rate.astype(np.float32, copy=False),
                     tempo=tempo,
                     beat_frames=beat_frames,
-                    sample_rate=sr
+                    sample_rate=sr,
+                    time_offset=t_start,
+                    hop_length=hop_length
                 )
                 
+                logger.info(f"Cechy audio: tempo={tempo:.1f} BPM, energia_avg={features.energy_mean:.3f}, ramek={len(energy_profile)}")
+                
+                self._save_cached_features(cache_path, features)
+                
+                return features
+                
             except Exception as e:
                 logger.error(f"Błąd obliczania cech audio: {e}")
                 return self._create_fallback_features()
@@ -127,6 +442,147 @@ class AudioSyncManager:
             logger.error(f"Błąd analizy audio: {e}")
             return self._create_fallback_features()
     
+    def _analysis_window(self, t_start: float, t_end: float) -> Tuple[float, float]:
+        """
+        Znormalizuj okno analizy: początek nieujemny, długość najwyżej max_analysis_seconds
+        
+        Args:
+            t_start: Żądany początek okna (s)
+            t_end: Żądany koniec okna (s)
+            
+        Returns:
+            Tuple (t_start, t_end) faktycznie analizowanego okna
+        """
+        t_start = max(0.0, float(t_start))
+        t_end = float(t_end)
+        if t_end - t_start > self.max_analysis_seconds:
+            logger.info(f"Okno analizy audio {t_start:.1f}-{t_end:.1f}s przycięte do {self.max_analysis_seconds:.0f}s")
+            t_end = t_start + self.max_analysis_seconds
+        return t_start, t_end
+    
+    def _feature_cache_path(self, audio_path: str, t_start: float, t_end: float) -> Optional[Path]:
+        """
+        Zbuduj ścieżkę pliku cache cech dla danego audio
+        
+        Dla PCM WAV hash SHA1 liczony jest z próbek analizowanego okna (pozycja z nagłówka)
+        wraz z rozmiarem pliku. Inne formaty hashowane są w całości z mmap'owanego pliku,
+        a powyżej _FULL_HASH_MAX_BYTES tylko pierwszy i ostatni MB.
+        
+        Args:
+            audio_path: Ścieżka do pliku audio
+            t_start: Początek analizowanego okna (s)
+            t_end: Koniec analizowanego okna (s)
+            
+        Returns:
+            Ścieżka do pliku .npz lub None gdy nie udało się policzyć hasha
+        """
+        try:
+            size = os.path.getsize(audio_path)
+            digest = hashlib.sha1()
+            digest.update(str(size).encode())
+            if size > 0 and not self._hash_wav_window(digest, audio_path, t_start, t_end):
+                with open(audio_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if size <= _FULL_HASH_MAX_BYTES:
+                        digest.update(mm)
+                    else:
+                        digest.update(mm[:_EDGE_HASH_BYTES])
+                        digest.update(mm[-_EDGE_HASH_BYTES:])
+            # Parametry i okno analizy są częścią klucza - ich zmiana unieważnia cache
+            digest.update(
+                f"{self.sample_rate}:{self.hop_length}:{self.frame_length}:{t_start:.3f}:{t_end:.3f}".encode()
+            )
+            return self.feature_cache_dir / f"{digest.hexdigest()}.npz"
+        except (OSError, ValueError) as e:
+            logger.warning(f"Nie można obliczyć klucza cache cech: {e}")
+            return None
+    
+    def _hash_wav_window(self, digest, audio_path: str, t_start: float, t_end: float) -> bool:
+        """
+        Dodaj do hasha bajty próbek PCM WAV z okna [t_start, t_end]
+        
+        Args:
+            digest: Obiekt hashlib do zaktualizowania
+            audio_path: Ścieżka do pliku audio
+            t_start: Początek analizowanego okna (s)
+            t_end: Koniec analizowanego okna (s)
+            
+        Returns:
+            True gdy plik jest PCM WAV i okno zostało zahashowane, False dla innych formatów
+        """
+        try:
+            with wave.open(audio_path, 'rb') as wav:
+                n_frames = wav.getnframes()
+                rate = wav.getframerate()
+                first = min(n_frames, int(t_start * rate))
+                last = min(n_frames, int(np.ceil(t_end * rate)))
+                wav.setpos(first)
+                digest.update(f"{wav.getnchannels()}:{wav.getsampwidth()}:{rate}".encode())
+                digest.update(wav.readframes(max(0, last - first)))
+            return True
+        except (wave.Error, EOFError):
+            return False
+    
+    def _load_cached_features(self, cache_path: Optional[Path]) -> Optional[AudioFeatures]:
+        """
+        Wczytaj cechy audio z cache
+        
+        Args:
+            cache_path: Ścieżka do pliku .npz
+            
+        Returns:
+            AudioFeatures lub None gdy brak wpisu w cache
+        """
+        if cache_path is None or not cache_path.exists():
+            return None
+        
+        try:
+            with np.load(cache_path) as data:
+                features = AudioFeatures(
+                    energy_profile=data['energy_profile'],
+                    spectral_centroids=data['spectral_centroids'],
+                    zero_crossing_rate=data['zero_crossing_rate'],
+                    tempo=float(data['tempo']),
+                    beat_frames=data['beat_frames'],
+                    sample_rate=int(data['sample_rate']),
+                    time_offset=float(data['time_offset']),
+                    hop_length=int(data['hop_length'])
+                )
+            logger.info(f"Cechy audio wczytane z cache: {cache_path.name}")
+            return features
+        except Exception as e:
+            logger.warning(f"Uszkodzony wpis cache cech {cache_path}: {e}")
+            return None
+    
+    def _save_cached_features(self, cache_path: Optional[Path], features: AudioFeatures):
+        """
+        Zapisz cechy audio do cache (zapis atomowy przez plik tymczasowy)
+        
+        Args:
+            cache_path: Ścieżka do pliku .npz
+            features: Obliczone cechy audio
+        """
+        if cache_path is None:
+            return
+        
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    energy_profile=features.energy_profile,
+                    spectral_centroids=features.spectral_centroids,
+                    zero_crossing_rate=features.zero_crossing_rate,
+                    beat_frames=features.beat_frames,
+                    tempo=np.float32(features.tempo),
+                    sample_rate=np.int32(features.sample_rate),
+                    time_offset=np.float64(features.time_offset),
+                    hop_length=np.int32(features.hop_length)
+                )
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Nie można zapisać cache cech: {e}")
+    
     def _create_fallback_features(self) -> AudioFeatures:
         """
         Stwórz podstawowe cechy audio w przypadku błędu
@@ -134,16 +590,16 @@ class AudioSyncManager:
         Returns:
             Podstawowe AudioFeatures
         """
-        # Stwórz symulowane cechy audio
-        duration_frames = 100  # Symuluj 100 ramek
-        
+        # Współdzielone stałe zamiast losowych danych, które nigdy nie skorelują się z napisami
         return AudioFeatures(
-            energy_profile=np.random.uniform(0.1, 0.8, duration_frames),  # Symulowana energia
-            spectral_centroids=np.random.uniform(1000, 2000, duration_frames),  # Symulowane centroidy
-            zero_crossing_rate=np.random.uniform(0.1, 0.4, duration_frames),  # Symulowany ZCR
+            energy_profile=_FALLBACK_ENERGY,
+            spectral_centroids=_FALLBACK_CENTROIDS,
+            zero_crossing_rate=_FALLBACK_ZCR,
             tempo=120.0,
-            beat_frames=np.arange(0, duration_frames, 10),  # Symulowane beaty
-            sample_rate=self.sample_rate
+            beat_frames=_FALLBACK_BEATS,
+            sample_rate=self.sample_rate,
+            is_fallback=True,
+            hop_length=self.hop_length
         )
     
     def detect_speech_segments(self, audio_features: AudioFeatures) -> List[Tuple[float, float]]:
@@ -160,42 +616,48 @@ class AudioSyncManager:
             return []
         
         # Próg energii dla wykrywania mowy
-        energy_threshold = np.mean(audio_features.energy_profile) + 0.5 * np.std(audio_features.energy_profile)
+        energy_threshold = audio_features.energy_mean + 0.5 * audio_features.energy_std
         
         # Znajdź segmenty powyżej progu
         speech_mask = audio_features.energy_profile > energy_threshold
         
-        # Konwertuj ramki na czas
-        frame_times = librosa.frames_to_time(
-            np.arange(len(speech_mask)),
-            sr=audio_features.sample_rate,
-            hop_length=self.hop_length
-        )
+        # Znajdź ciągłe segmenty mowy: krawędzie maski przez różnicę sąsiednich ramek
+        n_frames = len(speech_mask)
+        edges = np.diff(np.concatenate(([False], speech_mask, [False])).astype(np.int8))
+        start_frames = np.flatnonzero(edges == 1)
+        end_frames = np.flatnonzero(edges == -1)
+        
+        # Segment trwający do końca audio kończy się na ostatniej ramce i nie jest filtrowany
+        runs_to_end = end_frames == n_frames
+        end_frames = np.minimum(end_frames, n_frames - 1)
         
-        # Znajdź ciągłe segmenty mowy
-        speech_segments = []
-        in_speech = False
-        start_time = 0
-        
-        for i, is_speech in enumerate(speech_mask):
-            if is_speech and not in_speech:
-                # Początek segmentu mowy
-                start_time = frame_times[i]
-                in_speech = True
-            elif not is_speech and in_speech:
-                # Koniec segmentu mowy
-                end_time = frame_times[i]
-                if end_time - start_time > 0.3:  # Minimum 300ms
-                    speech_segments.append((start_time, end_time))
-                in_speech = False
-        
-        # Dodaj ostatni segment jeśli kończy się mową
-        if in_speech and len(frame_times) > 0:
-            speech_segments.append((start_time, frame_times[-1]))
+        start_times = start_frames * audio_features.frame_to_sec
+        end_times = end_frames * audio_features.frame_to_sec
+        keep = (end_times - start_times > 0.3) | runs_to_end  # Minimum 300ms
+        
+        start_times = start_times[keep] + audio_features.time_offset
+        end_times = end_times[keep] + audio_features.time_offset
+        speech_segments = list(zip(start_times.tolist(), end_times.tolist()))
         
         logger.info(f"Wykryto {len(speech_segments)} segmentów mowy")
         return speech_segments
     
+    def _cached_speech_segments(self, audio_features: AudioFeatures) -> List[Tuple[float, float]]:
+        """
+        Segmenty mowy liczone raz na obiekt cech (ponowne walidacje i próby)
+        
+        Args:
+            audio_features: Cechy audio
+            
+        Returns:
+            Lista krotek (start, end) w sekundach - nie modyfikować
+        """
+        speech_segments = self._speech_cache.get(audio_features)
+        if speech_segments is None:
+            speech_segments = self.detect_speech_segments(audio_features)
+            self._speech_cache[audio_features] = speech_segments
+        return speech_segments
+    
     def calculate_sync_offset(self, 
                             audio_features: AudioFeatures,
                             transcript_segments: List[Dict[str, Any]]) -> SyncCorrection:
@@ -210,51 +672,46 @@ class AudioSyncManager:
             SyncCorrection object
         """
         try:
+            # Cechy zastępcze nie niosą informacji - pomiń całe przeszukanie
+            if audio_features.is_fallback:
+                logger.warning("Brak cech audio (cechy zastępcze), pomijam synchronizację")
+                return SyncCorrection(0.0, 0.0, "no_data", 0)
+            
             # Wykryj segmenty mowy w audio
-            detected_speech = self.detect_speech_segments(audio_features)
+            detected_speech = self._cached_speech_segments(audio_features)
             
             if not detected_speech or not transcript_segments:
                 logger.warning("Brak segmentów do synchronizacji")
                 return SyncCorrection(0.0, 0.0, "no_data", 0)
             
-            # NOWA METODA: Precyzyjne dopasowanie na podstawie początków segmentów
-            best_offset, best_confidence = self._precise_onset_alignment(
-                audio_features, transcript_segments, detected_speech
+            # Jednorazowa konwersja segmentów do tablic dla wszystkich metod
+            segment_arrays = SegmentBatch.from_dicts(transcript_segments)
+            
+            # Jedno przeszukanie przesunięć: ważona suma wyników onsetów, energii i rytmu
+            best_offset, best_confidence = self._combined_offset_sweep(
+                audio_features, segment_arrays
             )
             
-            method = "precise_onset"
+            method = "combined_sweep"
             
-            # Jeśli precyzyjne dopasowanie nie działa, użyj metod zapasowych
+            # Jeśli połączone dopasowanie nie działa, użyj metod zapasowych
             if best_confidence < self.min_confidence:
-                logger.info(f"Precyzyjne dopasowanie ma niską pewność ({best_confidence:.2f}), próbuję inne metody...")
-                logger.info("Precyzyjne dopasowanie nieudane, próbuję metody energetycznej...")
+                logger.info(f"Połączone dopasowanie ma niską pewność ({best_confidence:.2f}), próbuję dopasowania DTW...")
                 
-                # Metoda energetyczna
-                energy_offset, energy_confidence = self._energy_based_sync(
-                    audio_features, transcript_segments
+                # Dopasowanie DTW (odporne na dryf i zmienne opóźnienie)
+                dtw_offset, dtw_confidence = self._dtw_based_sync(
+                    audio_features, segment_arrays
                 )
                 
-                if energy_confidence > best_confidence:
-                    best_offset = energy_offset
-                    best_confidence = energy_confidence
-                    method = "energy_based"
-                
-                # Metoda rytmiczna jako ostatnia deska ratunku
-                if best_confidence < self.min_confidence:
-                    logger.info("Metoda energetyczna nieudana, próbuję dopasowanie rytmiczne...")
-                    rhythm_offset, rhythm_confidence = self._rhythm_based_sync(
-                        audio_features, transcript_segments
-                    )
-                    
-                    if rhythm_confidence > best_confidence:
-                        best_offset = rhythm_offset
-                        best_confidence = rhythm_confidence
-                        method = "rhythm_based"
+                if dtw_confidence > best_confidence:
+                    best_offset = dtw_offset
+                    best_confidence = dtw_confidence
+                    method = "dtw_alignment"
                 
                 # Jeśli nadal niska pewność, użyj prostego oszacowania
                 if best_confidence < self.min_confidence:
                     logger.info("Wszystkie metody mają niską pewność, używam prostego oszacowania...")
-                    simple_offset, simple_confidence = self._simple_estimation_sync(transcript_segments)
+                    simple_offset, simple_confidence = self._simple_estimation_sync(segment_arrays)
                     
                     if simple_confidence > best_confidence:
                         best_offset = simple_offset
@@ -267,61 +724,109 @@ class AudioSyncManager:
                 offset_seconds=best_offset,
                 confidence=best_confidence,
                 method=method,
-                segments_adjusted=len(transcript_segments)
+                segments_adjusted=len(segment_arrays)
             )
             
         except Exception as e:
             logger.error(f"Błąd obliczania przesunięcia: {e}")
             return SyncCorrection(0.0, 0.0, "error", 0)
     
-    def _precise_onset_alignment(self, 
+    def _combined_offset_sweep(self, 
                                audio_features: AudioFeatures,
-                               transcript_segments: List[Dict[str, Any]],
-                               detected_speech: List[Tuple[float, float]]) -> Tuple[float, float]:
+                               segment_arrays: SegmentBatch) -> Tuple[float, float]:
         """
-        Precyzyjne dopasowanie na podstawie początków segmentów mowy
+        Jedno przeszukanie przesunięć łączące trzy znormalizowane wyniki
+        
+        Krzywe dopasowania onsetów, energii i rytmu liczone są korelacją FFT na wspólnej
+        siatce 50ms i sumowane z wagami 0.5/0.3/0.2. Niedostępne sygnały (np. brak beatów)
+        są pomijane, a wagi pozostałych renormalizowane.
         
         Args:
             audio_features: Cechy audio
-            transcript_segments: Segmenty transkrypcji
-            detected_speech: Wykryte segmenty mowy
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
             
         Returns:
             Tuple (offset, confidence)
         """
-        if len(audio_features.energy_profile) == 0 or not detected_speech or not transcript_segments:
+        if len(audio_features.energy_profile) == 0 or len(segment_arrays) == 0:
             return 0.0, 0.0
         
-        # Znajdź początki segmentów w audio (onset detection)
-        audio_onsets = self._detect_speech_onsets(audio_features)
+        # Wspólna siatka czasu dla wszystkich sygnałów
+        resolution = 0.05
+        max_lag_bins = int(round(self.max_offset_seconds / resolution))
+        audio_end = audio_features.time_offset + len(audio_features.energy_profile) * audio_features.frame_to_sec
+        timeline_end = max(audio_end, float(segment_arrays.ends.max()))
+        n_bins = int(np.ceil(timeline_end / resolution)) + 1
+        
+        weighted_curves = [
+            (0.5, self._onset_score_curve(audio_features, segment_arrays, resolution, n_bins, max_lag_bins)),
+            (0.3, self._energy_score_curve(audio_features, segment_arrays, resolution, n_bins, max_lag_bins)),
+            (0.2, self._rhythm_score_curve(audio_features, segment_arrays, resolution, n_bins, max_lag_bins)),
+        ]
+        weighted_curves = [(weight, curve) for weight, curve in weighted_curves if curve is not None]
+        if not weighted_curves:
+            return 0.0, 0.0
+        
+        normalization = sum(weight for weight, _ in weighted_curves)
+        combined = np.zeros(2 * max_lag_bins + 1, dtype=np.float32)
+        for weight, curve in weighted_curves:
+            combined += weight * curve
         
-        # Początki segmentów z transkrypcji
-        transcript_onsets = [seg['start'] for seg in transcript_segments]
+        best_idx = int(np.argmax(combined))
+        best_offset = float((best_idx - max_lag_bins) * resolution)
+        confidence = float(np.clip(combined[best_idx] / normalization, 0.0, 1.0))
+        
+        logger.debug(f"Połączone dopasowanie: offset={best_offset:.2f}s, confidence={confidence:.2f}, "
+                     f"sygnałów={len(weighted_curves)}")
+        return best_offset, confidence
+    
+    def _onset_score_curve(self, 
+                           audio_features: AudioFeatures,
+                           segment_arrays: SegmentBatch,
+                           resolution: float,
+                           n_bins: int,
+                           max_lag_bins: int) -> Optional[np.ndarray]:
+        """
+        Wynik dopasowania początków segmentów dla wszystkich przesunięć
+        
+        Args:
+            audio_features: Cechy audio
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
+            resolution: Rozdzielczość siatki (s)
+            n_bins: Długość siatki
+            max_lag_bins: Maksymalne przesunięcie w przedziałach
+            
+        Returns:
+            Krzywa wyników (0-1) lub None gdy za mało onsetów
+        """
+        audio_onsets = self._detect_speech_onsets(audio_features)
+        transcript_onsets = segment_arrays.starts
         
         if len(audio_onsets) < 2 or len(transcript_onsets) < 2:
-            return 0.0, 0.0
+            return None
         
-        best_offset = 0.0
-        best_score = 0.0
+        tolerance_bins = int(round(0.3 / resolution))  # 300ms tolerancji
         
-        # Testuj różne przesunięcia z większą precyzją
-        test_offsets = np.arange(-self.max_offset_seconds, self.max_offset_seconds, 0.05)
+        audio_bins = np.round(np.asarray(audio_onsets) / resolution).astype(np.int64)
+        transcript_bins = np.round(transcript_onsets / resolution).astype(np.int64)
+        transcript_bins = transcript_bins[transcript_bins >= 0]
         
-        for offset in test_offsets:
-            shifted_transcript = [onset + offset for onset in transcript_onsets]
-            
-            # Oblicz dopasowanie początków
-            score = self._calculate_onset_alignment_score(audio_onsets, shifted_transcript)
-            
-            if score > best_score:
-                best_score = score
-                best_offset = offset
+        if len(transcript_bins) == 0:
+            return None
         
-        # Konwertuj score na confidence (0-1)
-        confidence = min(best_score, 1.0)
+        # Pole dopasowania audio: trójkątne jądro tolerancji wokół każdego onsetu,
+        # maksimum (nie suma) odpowiada odległości do najbliższego onsetu
+        kernel_offsets = np.arange(-tolerance_bins, tolerance_bins + 1)
+        kernel_weights = (1.0 - np.abs(kernel_offsets) / tolerance_bins).astype(np.float32)
+        audio_field = np.zeros(n_bins, dtype=np.float32)
+        field_idx = audio_bins[:, None] + kernel_offsets[None, :]
+        valid = (field_idx >= 0) & (field_idx < n_bins)
+        np.maximum.at(audio_field, field_idx[valid], np.broadcast_to(kernel_weights, field_idx.shape)[valid])
         
-        logger.debug(f"Precyzyjne dopasowanie: offset={best_offset:.2f}s, confidence={confidence:.2f}")
-        return best_offset, confidence
+        # Ciąg impulsów początków transkrypcji
+        transcript_impulses = np.bincount(transcript_bins).astype(np.float32)
+        
+        return _xcorr_at_lags(audio_field, transcript_impulses, max_lag_bins) / len(transcript_onsets)
     
     def _detect_speech_onsets(self, audio_features: AudioFeatures) -> List[float]:
         """
@@ -341,135 +846,159 @@ class AudioSyncManager:
         energy_diff = np.maximum(energy_diff, 0)  # Tylko wzrosty energii
         
         # Znajdź lokalne maksima (potencjalne początki)
-        from scipy.signal import find_peaks
-        
         # Próg dla wykrywania początków
-        threshold = np.mean(energy_diff) + 1.5 * np.std(energy_diff)
+        diff_mean, diff_std = _mean_std(energy_diff)
+        threshold = diff_mean + 1.5 * diff_std
         
         peaks, _ = find_peaks(energy_diff, height=threshold, distance=10)  # Min 10 ramek między pikami
         
         # Konwertuj ramki na czas
-        frame_times = librosa.frames_to_time(
-            peaks,
-            sr=audio_features.sample_rate,
-            hop_length=self.hop_length
-        )
+        frame_times = peaks * audio_features.frame_to_sec + audio_features.time_offset
         
         logger.debug(f"Wykryto {len(frame_times)} początków segmentów mowy")
         return frame_times.tolist()
     
-    def _calculate_onset_alignment_score(self, 
-                                       audio_onsets: List[float],
-                                       transcript_onsets: List[float]) -> float:
+    def _energy_score_curve(self, 
+                            audio_features: AudioFeatures,
+                            segment_arrays: SegmentBatch,
+                            resolution: float,
+                            n_bins: int,
+                            max_lag_bins: int) -> Optional[np.ndarray]:
         """
-        Oblicz wynik dopasowania początków segmentów
+        Korelacja profilu energii z aktywnością transkrypcji dla wszystkich przesunięć
         
         Args:
-            audio_onsets: Początki w audio
-            transcript_onsets: Początki w transkrypcji
+            audio_features: Cechy audio
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
+            resolution: Rozdzielczość siatki (s)
+            n_bins: Długość siatki
+            max_lag_bins: Maksymalne przesunięcie w przedziałach
             
         Returns:
-            Wynik dopasowania (wyższy = lepszy)
+            Krzywa korelacji lub None dla sygnału stałego
         """
-        if not audio_onsets or not transcript_onsets:
-            return 0.0
+        time_bins = np.arange(n_bins, dtype=np.float32)
+        np.multiply(time_bins, resolution, out=time_bins)
         
-        total_score = 0.0
-        tolerance = 0.3  # 300ms tolerancji
+        # Aktywność transkrypcji przez sumę różnicową: +1 na początku, -1 na końcu segmentu
+        start_idx = (segment_arrays.starts / resolution).astype(int)
+        end_idx = np.minimum((segment_arrays.ends / resolution).astype(int), n_bins)
+        valid = (start_idx >= 0) & (end_idx > start_idx)
         
-        for t_onset in transcript_onsets:
-            # Znajdź najbliższy onset w audio
-            distances = [abs(a_onset - t_onset) for a_onset in audio_onsets]
-            min_distance = min(distances)
-            
-            # Wynik na podstawie odległości
-            if min_distance <= tolerance:
-                score = 1.0 - (min_distance / tolerance)
-                total_score += score
+        delta = np.zeros(n_bins + 1, dtype=np.float32)
+        np.add.at(delta, start_idx[valid], 1)
+        np.add.at(delta, end_idx[valid], -1)
+        transcript_activity = (np.cumsum(delta[:-1]) > 0).astype(np.float32)
+        
+        # Znormalizowana energia audio na tej samej siatce (zero poza analizowanym oknem)
+        energy = audio_features.energy_profile
+        energy = (energy - np.min(energy)) / (np.max(energy) - np.min(energy) + 1e-8)
+        audio_activity = np.interp(time_bins, audio_features.frame_times, energy, left=0.0, right=0.0).astype(np.float32)
         
-        # Normalizuj przez liczbę segmentów transkrypcji
-        return total_score / len(transcript_onsets) if transcript_onsets else 0.0
+        return _pearson_xcorr_at_lags(audio_activity, transcript_activity, max_lag_bins)
     
-    def _energy_based_sync(self, 
-                          audio_features: AudioFeatures,
-                          transcript_segments: List[Dict[str, Any]]) -> Tuple[float, float]:
+    def _dtw_based_sync(self, 
+                        audio_features: AudioFeatures,
+                        segment_arrays: SegmentBatch) -> Tuple[float, float]:
         """
-        Synchronizacja oparta na profilu energii
+        Synchronizacja przez Dynamic Time Warping profilu aktywności transkrypcji
+        względem profilu energii audio
+        
+        Ścieżka DTW dopuszcza dryf i zmienne opóźnienie; jako globalne przesunięcie
+        zwracana jest mediana przesunięć na ścieżce w obszarach mowy.
         
         Args:
             audio_features: Cechy audio
-            transcript_segments: Segmenty transkrypcji
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
             
         Returns:
             Tuple (offset, confidence)
         """
-        if len(audio_features.energy_profile) == 0 or not transcript_segments:
+        try:
+            if len(audio_features.energy_profile) < 2 or len(segment_arrays) == 0:
+                return 0.0, 0.0
+            
+            # Siatka obejmuje tylko analizowane okno audio: 100ms, a dla długich okien
+            # rzadziej, tak by liczba przedziałów nie przekroczyła _DTW_MAX_BINS
+            audio_time_bins = audio_features.frame_times
+            grid_start = float(audio_time_bins[0])
+            span = float(audio_time_bins[-1]) - grid_start
+            time_resolution = max(0.1, span / _DTW_MAX_BINS)
+            time_bins = np.arange(grid_start, float(audio_time_bins[-1]), time_resolution)
+            n_bins = len(time_bins)
+            if n_bins < 2:
+                return 0.0, 0.0
+            
+            audio_activity = np.interp(time_bins, audio_time_bins, audio_features.energy_profile)
+            audio_activity = (audio_activity - np.min(audio_activity)) / (np.max(audio_activity) - np.min(audio_activity) + 1e-8)
+            
+            # Profil aktywności transkrypcji na tej samej siatce (przycięty do okna audio)
+            start_idx = np.maximum(((segment_arrays.starts - grid_start) / time_resolution).astype(int), 0)
+            end_idx = np.minimum(
+                ((segment_arrays.ends - grid_start) / time_resolution).astype(int), n_bins
+            )
+            valid = end_idx > start_idx
+            
+            delta = np.zeros(n_bins + 1)
+            np.add.at(delta, start_idx[valid], 1)
+            np.add.at(delta, end_idx[valid], -1)
+            transcript_activity = (np.cumsum(delta[:-1]) > 0).astype(np.float64)
+            
+            if not transcript_activity.any():
+                return 0.0, 0.0
+            
+            # DTW z ograniczeniem pasma do ±max_offset_seconds
+            band_rad = min(1.0, self.max_offset_seconds / (n_bins * time_resolution))
+            _, warping_path = librosa.sequence.dtw(
+                X=transcript_activity[np.newaxis, :],
+                Y=audio_activity[np.newaxis, :],
+                metric='euclidean',
+                global_constraints=True,
+                band_rad=band_rad
+            )
+            
+            # Przesunięcia na ścieżce liczone tylko tam, gdzie transkrypcja ma mowę
+            speech_on_path = transcript_activity[warping_path[:, 0]] > 0
+            lags = warping_path[speech_on_path, 1] - warping_path[speech_on_path, 0]
+            offset_bins = int(np.round(np.median(lags)))
+            offset_seconds = float(np.clip(offset_bins * time_resolution, -self.max_offset_seconds, self.max_offset_seconds))
+            
+            # Confidence: korelacja profili po zastosowaniu globalnego przesunięcia
+            if offset_bins >= 0:
+                shifted_transcript = transcript_activity[:n_bins - offset_bins]
+                matched_audio = audio_activity[offset_bins:]
+            else:
+                shifted_transcript = transcript_activity[-offset_bins:]
+                matched_audio = audio_activity[:n_bins + offset_bins]
+            
+            if len(shifted_transcript) < 2 or np.std(shifted_transcript) == 0 or np.std(matched_audio) == 0:
+                return offset_seconds, 0.0
+            
+            correlation = np.corrcoef(shifted_transcript, matched_audio)[0, 1]
+            confidence = float(np.clip(correlation, 0.0, 1.0)) if not np.isnan(correlation) else 0.0
+            
+            logger.debug(f"Synchronizacja DTW: offset={offset_seconds:.2f}s, confidence={confidence:.2f}")
+            return offset_seconds, confidence
+            
+        except Exception as e:
+            logger.error(f"Błąd synchronizacji DTW: {e}")
             return 0.0, 0.0
-        
-        # Stwórz profil aktywności z segmentów transkrypcji
-        max_time = max(seg['end'] for seg in transcript_segments) + 2.0
-        time_resolution = 0.1  # 100ms rozdzielczość
-        time_bins = np.arange(0, max_time, time_resolution)
-        
-        transcript_activity = np.zeros(len(time_bins))
-        
-        for seg in transcript_segments:
-            start_idx = int(seg['start'] / time_resolution)
-            end_idx = int(seg['end'] / time_resolution)
-            if start_idx < len(transcript_activity) and end_idx <= len(transcript_activity):
-                transcript_activity[start_idx:end_idx] = 1.0
-        
-        # Przeskaluj profil energii audio do tej samej rozdzielczości
-        audio_time_bins = librosa.frames_to_time(
-            np.arange(len(audio_features.energy_profile)),
-            sr=audio_features.sample_rate,
-            hop_length=self.hop_length
-        )
-        
-        # Interpoluj energię audio do nowej siatki czasowej
-        audio_activity = np.interp(time_bins, audio_time_bins, audio_features.energy_profile)
-        
-        # Normalizuj
-        audio_activity = (audio_activity - np.min(audio_activity)) / (np.max(audio_activity) - np.min(audio_activity) + 1e-8)
-        
-        # Znajdź najlepsze przesunięcie przez cross-correlation
-        from scipy.signal import correlate
-        
-        correlation = correlate(audio_activity, transcript_activity, mode='full')
-        
-        # Znajdź maksimum korelacji
-        max_corr_idx = np.argmax(correlation)
-        
-        # Oblicz przesunięcie
-        offset_bins = max_corr_idx - (len(transcript_activity) - 1)
-        offset_seconds = offset_bins * time_resolution
-        
-        # Ograniczenie do rozsądnego zakresu
-        offset_seconds = np.clip(offset_seconds, -self.max_offset_seconds, self.max_offset_seconds)
-        
-        # Confidence na podstawie wartości korelacji
-        max_correlation = correlation[max_corr_idx]
-        confidence = max_correlation / len(transcript_activity) if len(transcript_activity) > 0 else 0.0
-        confidence = np.clip(confidence, 0.0, 1.0)
-        
-        logger.debug(f"Synchronizacja energetyczna: offset={offset_seconds:.2f}s, confidence={confidence:.2f}")
-        return offset_seconds, confidence
     
-    def _simple_estimation_sync(self, transcript_segments: List[Dict[str, Any]]) -> Tuple[float, float]:
+    def _simple_estimation_sync(self, segment_arrays: SegmentBatch) -> Tuple[float, float]:
         """
         Prosta metoda oszacowania synchronizacji jako fallback
         
         Args:
-            transcript_segments: Segmenty transkrypcji
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
             
         Returns:
             Tuple (offset, confidence)
         """
-        if not transcript_segments:
+        if len(segment_arrays) == 0:
             return 0.0, 0.0
         
         # Sprawdź czy pierwszy segment zaczyna się bardzo wcześnie (może wskazywać na przesunięcie)
-        first_start = transcript_segments[0].get('start', 0)
+        first_start = float(segment_arrays.starts[0])
         
         # Jeśli pierwszy segment zaczyna się bardzo wcześnie, może być przesunięcie
         if first_start < 0.5:
@@ -486,132 +1015,79 @@ class AudioSyncManager:
     
     def _calculate_alignment_confidence(self, 
                                       detected_speech: List[Tuple[float, float]],
-                                      transcript_times: List[Tuple[float, float]],
+                                      segment_arrays: SegmentBatch,
                                       offset: float) -> float:
         """
         Oblicz pewność dopasowania dla danego przesunięcia
         
         Args:
             detected_speech: Wykryte segmenty mowy
-            transcript_times: Czasy segmentów transkrypcji
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
             offset: Testowane przesunięcie
             
         Returns:
             Pewność dopasowania (0.0 - 1.0)
         """
-        if not detected_speech or not transcript_times:
+        if not detected_speech or len(segment_arrays) == 0:
             return 0.0
         
-        # Przesuń czasy transkrypcji
-        shifted_transcript = [(start + offset, end + offset) for start, end in transcript_times]
-        
-        # Oblicz pokrycie
-        total_overlap = 0.0
-        total_transcript_duration = 0.0
+        speech_array = np.asarray(sorted(detected_speech), dtype=np.float64)
         
-        for trans_start, trans_end in shifted_transcript:
-            trans_duration = trans_end - trans_start
-            total_transcript_duration += trans_duration
-            
-            # Znajdź pokrycie z wykrytymi segmentami mowy
-            for speech_start, speech_end in detected_speech:
-                overlap_start = max(trans_start, speech_start)
-                overlap_end = min(trans_end, speech_end)
-                
-                if overlap_start < overlap_end:
-                    total_overlap += overlap_end - overlap_start
+        # Oblicz pokrycie przesuniętych segmentów (sweep-line po posortowanych segmentach mowy)
+        overlaps = _coverage(
+            segment_arrays.starts + offset, segment_arrays.ends + offset,
+            speech_array[:, 0], speech_array[:, 1]
+        )
+        total_overlap = float(overlaps.sum())
+        total_transcript_duration = float((segment_arrays.ends - segment_arrays.starts).sum())
         
         # Pewność jako stosunek pokrycia do całkowitego czasu transkrypcji
         confidence = total_overlap / total_transcript_duration if total_transcript_duration > 0 else 0.0
         return min(confidence, 1.0)
     
-    def _rhythm_based_sync(self, 
-                          audio_features: AudioFeatures,
-                          transcript_segments: List[Dict[str, Any]]) -> Tuple[float, float]:
+    def _rhythm_score_curve(self, 
+                            audio_features: AudioFeatures,
+                            segment_arrays: SegmentBatch,
+                            resolution: float,
+                            n_bins: int,
+                            max_lag_bins: int) -> Optional[np.ndarray]:
         """
-        Synchronizacja oparta na rytmie mowy
+        Korelacja rytmu (beaty audio vs początki segmentów) dla wszystkich przesunięć
         
         Args:
             audio_features: Cechy audio
-            transcript_segments: Segmenty transkrypcji
-            
-        Returns:
-            Tuple (offset, confidence)
-        """
-        try:
-            if len(audio_features.beat_frames) == 0:
-                return 0.0, 0.0
-            
-            # Konwertuj beat frames na czas
-            beat_times = librosa.frames_to_time(
-                audio_features.beat_frames,
-                sr=audio_features.sample_rate,
-                hop_length=self.hop_length
-            )
-            
-            # Oblicz rytm segmentów transkrypcji
-            segment_starts = [seg['start'] for seg in transcript_segments]
-            
-            if len(segment_starts) < 2:
-                return 0.0, 0.0
-            
-            # Znajdź najlepsze dopasowanie rytmu
-            best_offset = 0.0
-            best_correlation = 0.0
-            
-            for offset in np.arange(-2.0, 2.0, 0.1):
-                shifted_starts = [start + offset for start in segment_starts]
-                
-                # Oblicz korelację z beat times
-                correlation = self._calculate_rhythm_correlation(beat_times, shifted_starts)
-                
-                if correlation > best_correlation:
-                    best_correlation = correlation
-                    best_offset = offset
-            
-            return best_offset, best_correlation
-            
-        except Exception as e:
-            logger.error(f"Błąd synchronizacji rytmicznej: {e}")
-            return 0.0, 0.0
-    
-    def _calculate_rhythm_correlation(self, beat_times: np.ndarray, segment_starts: List[float]) -> float:
-        """
-        Oblicz korelację między rytmem audio a początkami segmentów
-        
-        Args:
-            beat_times: Czasy beatów w audio
-            segment_starts: Początki segmentów transkrypcji
+            segment_arrays: Segmenty transkrypcji (tablice SoA)
+            resolution: Rozdzielczość siatki (s)
+            n_bins: Długość siatki
+            max_lag_bins: Maksymalne przesunięcie w przedziałach
             
         Returns:
-            Korelacja (0.0 - 1.0)
+            Krzywa korelacji lub None gdy brak beatów
         """
-        if len(beat_times) == 0 or len(segment_starts) == 0:
-            return 0.0
+        if len(audio_features.beat_frames) == 0 or len(segment_arrays) < 2:
+            return None
         
-        # Stwórz histogramy czasowe
-        max_time = max(max(beat_times), max(segment_starts))
-        bins = np.arange(0, max_time + 1, 0.1)
+        beat_times = audio_features.beat_frames * audio_features.frame_to_sec + audio_features.time_offset
         
-        beat_hist, _ = np.histogram(beat_times, bins=bins)
-        segment_hist, _ = np.histogram(segment_starts, bins=bins)
+        # Histogramy na wspólnej siatce - przesunięcie o k przedziałów to przesunięcie histogramu
+        beat_bins = np.round(beat_times / resolution).astype(np.int64)
+        segment_bins = np.round(segment_arrays.starts / resolution).astype(np.int64)
+        beat_hist = np.bincount(beat_bins[(beat_bins >= 0) & (beat_bins < n_bins)], minlength=n_bins).astype(np.float32)
+        segment_hist = np.bincount(segment_bins[(segment_bins >= 0) & (segment_bins < n_bins)], minlength=n_bins).astype(np.float32)
         
-        # Oblicz korelację
-        if np.std(beat_hist) == 0 or np.std(segment_hist) == 0:
-            return 0.0
-        
-        correlation = np.corrcoef(beat_hist, segment_hist)[0, 1]
-        return max(0.0, correlation) if not np.isnan(correlation) else 0.0
+        return _pearson_xcorr_at_lags(beat_hist, segment_hist, max_lag_bins)
     
     def apply_sync_correction(self, 
                             segments: List[Dict[str, Any]], 
-                            correction: SyncCorrection) -> List[Dict[str, Any]]:
+                            correction: SyncCorrection,
+                            inplace: bool = True) -> List[Dict[str, Any]]:
         """
         Zastosuj korekcję synchronizacji do segmentów
         
         Args:
             segments: Segmenty do korekty
             correction: Korekta synchronizacji
+            inplace: Modyfikuj segmenty w miejscu; False - jedna płytka kopia listy na wejściu
             
         Returns:
             Skorygowane segmenty
@@ -627,232 +1103,80 @@ class AudioSyncManager:
         else:
             offset = correction.offset_seconds
         
-        corrected_segments = []
-        
         logger.info(f"Stosowanie korekty synchronizacji: {offset:.2f}s (oryginalne: {correction.offset_seconds:.2f}s)")
         
-        # ULEPSZONA KOREKTA: Adaptacyjne dostosowanie dla każdego segmentu
-        for i, segment in enumerate(segments):
-            corrected_segment = segment.copy()
-            
-            # Oblicz adaptacyjne przesunięcie dla tego segmentu
-            adaptive_offset = self._calculate_adaptive_offset(segment, offset, i, len(segments))
-            
-            # Zastosuj przesunięcie z walidacją
-            new_start = max(0.0, segment['start'] + adaptive_offset)
-            new_end = max(new_start + 0.1, segment['end'] + adaptive_offset)
-            
-            # Sprawdź czy nowe czasy są rozsądne
-            if self._validate_segment_timing(new_start, new_end, segment):
-                corrected_segment['start'] = new_start
-                corrected_segment['end'] = new_end
-            else:
-                # Jeśli korekta prowadzi do nierozsądnych czasów, użyj mniejszej korekty
-                fallback_offset = adaptive_offset * 0.5
-                corrected_segment['start'] = max(0.0, segment['start'] + fallback_offset)
-                corrected_segment['end'] = max(corrected_segment['start'] + 0.1, segment['end'] + fallback_offset)
-                logger.warning(f"Segment {i}: Użyto zmniejszonej korekty ({fallback_offset:.2f}s)")
-            
-            # Dodaj rozszerzone informacje o korekcie
-            corrected_segment['sync_corrected'] = True
-            corrected_segment['sync_offset'] = adaptive_offset
-            corrected_segment['sync_confidence'] = correction.confidence
-            corrected_segment['sync_method'] = correction.method
-            corrected_segment['original_start'] = segment['start']
-            corrected_segment['original_end'] = segment['end']
-            
-            corrected_segments.append(corrected_segment)
-        
-        # Post-processing: Upewnij się, że segmenty się nie nakładają
-        corrected_segments = self._fix_overlapping_segments(corrected_segments)
-        
-        logger.info(f"Skorygowano {len(corrected_segments)} segmentów z adaptacyjnym przesunięciem")
-        return corrected_segments
-    
-    def _calculate_adaptive_offset(self, segment: Dict[str, Any], base_offset: float, 
-                                 segment_index: int, total_segments: int) -> float:
-        """
-        Oblicz adaptacyjne przesunięcie dla konkretnego segmentu
+        if not inplace:
+            segments = [dict(segment) for segment in segments]
         
-        Args:
-            segment: Segment do korekty
-            base_offset: Podstawowe przesunięcie
-            segment_index: Indeks segmentu
-            total_segments: Całkowita liczba segmentów
-            
-        Returns:
-            Adaptacyjne przesunięcie
-        """
-        # Bazowe przesunięcie
-        adaptive_offset = base_offset
-        
-        # Zmniejsz korekcję dla pierwszego i ostatniego segmentu (często problematyczne)
-        if segment_index == 0 or segment_index == total_segments - 1:
-            adaptive_offset *= 0.7
-        
-        # Uwzględnij długość segmentu - krótsze segmenty potrzebują mniejszej korekty
-        segment_duration = segment['end'] - segment['start']
-        if segment_duration < 1.0:  # Segmenty krótsze niż 1s
-            adaptive_offset *= 0.8
-        elif segment_duration > 5.0:  # Segmenty dłuższe niż 5s
-            adaptive_offset *= 1.1
-        
-        # Uwzględnij pewność segmentu jeśli dostępna
-        segment_confidence = segment.get('confidence', 1.0)
-        if segment_confidence < 0.7:
-            adaptive_offset *= segment_confidence
-        
-        return adaptive_offset
-    
-    def _validate_segment_timing(self, start: float, end: float, original_segment: Dict[str, Any]) -> bool:
-        """
-        Waliduj czy nowe czasy segmentu są rozsądne
-        
-        Args:
-            start: Nowy czas rozpoczęcia
-            end: Nowy czas zakończenia
-            original_segment: Oryginalny segment
-            
-        Returns:
-            True jeśli timing jest rozsądny
-        """
-        # Sprawdź podstawowe warunki
-        if start < 0 or end <= start:
-            return False
-        
-        # Sprawdź czy długość segmentu nie zmieniła się drastycznie
-        original_duration = original_segment['end'] - original_segment['start']
-        new_duration = end - start
-        
-        duration_ratio = new_duration / original_duration if original_duration > 0 else 1.0
-        
-        # Akceptuj zmiany długości do 20%
-        if duration_ratio < 0.8 or duration_ratio > 1.2:
-            return False
-        
-        # Sprawdź czy przesunięcie nie jest zbyt drastyczne
-        start_shift = abs(start - original_segment['start'])
-        if start_shift > 3.0:  # Maksymalnie 3s przesunięcia
-            return False
-        
-        return True
-    
-    def _fix_overlapping_segments(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Napraw nakładające się segmenty
-        
-        Args:
-            segments: Lista segmentów do naprawy
-            
-        Returns:
-            Lista segmentów bez nakładania
-        """
-        if len(segments) <= 1:
-            return segments
-        
-        fixed_segments = []
+        # ULEPSZONA KOREKTA: Adaptacyjne dostosowanie i naprawa nakładania (kernel JIT)
+        segment_arrays = SegmentBatch.from_dicts(segments)
+        new_starts, new_ends, used_offsets, fallback_mask, overlap_mask = _apply_offsets(
+            segment_arrays.starts, segment_arrays.ends, segment_arrays.confidences, offset
+        )
         
-        for i, segment in enumerate(segments):
-            fixed_segment = segment.copy()
-            
-            # Sprawdź nakładanie z poprzednim segmentem
-            if i > 0:
-                prev_segment = fixed_segments[-1]
-                if fixed_segment['start'] < prev_segment['end']:
-                    # Nakładanie wykryte - dostosuj
-                    gap = 0.1  # 100ms przerwy między segmentami
-                    fixed_segment['start'] = prev_segment['end'] + gap
-                    
-                    # Upewnij się, że segment ma minimalną długość
-                    min_duration = 0.5
-                    if fixed_segment['end'] - fixed_segment['start'] < min_duration:
-                        fixed_segment['end'] = fixed_segment['start'] + min_duration
-                    
-                    logger.debug(f"Naprawiono nakładanie segmentu {i}: nowy start {fixed_segment['start']:.2f}s")
+        for i in np.flatnonzero(fallback_mask):
+            logger.warning(f"Segment {i}: Użyto zmniejszonej korekty ({used_offsets[i] * 0.5:.2f}s)")
+        for i in np.flatnonzero(overlap_mask):
+            logger.debug(f"Naprawiono nakładanie segmentu {i}: nowy start {new_starts[i]:.2f}s")
+        
+        # Jeden przebieg zapisu w miejscu - bez kopiowania słowników
+        for segment, original_start, original_end, new_start, new_end, adaptive_offset in zip(
+            segments, segment_arrays.starts.tolist(), segment_arrays.ends.tolist(),
+            new_starts.tolist(), new_ends.tolist(), used_offsets.tolist()
+        ):
+            segment['start'] = new_start
+            segment['end'] = new_end
             
-            fixed_segments.append(fixed_segment)
-        
-        return fixed_segments
+            # Dodaj rozszerzone informacje o korekcie
+            segment['sync_corrected'] = True
+            segment['sync_offset'] = adaptive_offset
+            segment['sync_confidence'] = correction.confidence
+            segment['sync_method'] = correction.method
+            segment['original_start'] = original_start
+            segment['original_end'] = original_end
+        
+        logger.info(f"Skorygowano {len(segments)} segmentów z adaptacyjnym przesunięciem")
+        return segments
     
     def fine_tune_segment_timing(self, 
                                segments: List[Dict[str, Any]],
-                               audio_features: AudioFeatures) -> List[Dict[str, Any]]:
+                               audio_features: AudioFeatures,
+                               inplace: bool = True) -> List[Dict[str, Any]]:
         """
         Precyzyjne dostrojenie timingu segmentów
         
         Args:
             segments: Segmenty do dostrojenia
             audio_features: Cechy audio
+            inplace: Modyfikuj segmenty w miejscu; False - jedna płytka kopia listy na wejściu
             
         Returns:
             Dostrojone segmenty
         """
-        if len(audio_features.energy_profile) == 0:
+        if len(audio_features.energy_profile) == 0 or audio_features.is_fallback:
             return segments
         
-        fine_tuned_segments = []
+        # Ramki są równomiernie rozłożone - okna wyszukiwania wyznaczane arytmetyką indeksów (kernel JIT)
+        energy_profile = audio_features.energy_profile
+        frame_to_sec = audio_features.frame_to_sec
+        time_offset = audio_features.time_offset
         
-        # Konwertuj energie na czas
-        frame_times = librosa.frames_to_time(
-            np.arange(len(audio_features.energy_profile)),
-            sr=audio_features.sample_rate,
-            hop_length=self.hop_length
+        if not inplace:
+            segments = [dict(segment) for segment in segments]
+        
+        segment_arrays = SegmentBatch.from_dicts(segments)
+        new_starts, new_ends = _fine_tune_boundaries(
+            energy_profile, segment_arrays.starts, segment_arrays.ends, frame_to_sec, time_offset
         )
         
-        for segment in segments:
-            fine_tuned_segment = segment.copy()
-            
-            # Znajdź najbliższe punkty wysokiej energii dla początku i końca
-            start_time = segment['start']
-            end_time = segment['end']
-            
-            # Dostrojenie początku segmentu
-            start_window = 0.5  # 500ms okno wyszukiwania
-            start_candidates = frame_times[
-                (frame_times >= start_time - start_window) & 
-                (frame_times <= start_time + start_window)
-            ]
-            
-            if len(start_candidates) > 0:
-                # Znajdź punkt o najwyższej energii w oknie
-                start_indices = np.where(
-                    (frame_times >= start_time - start_window) & 
-                    (frame_times <= start_time + start_window)
-                )[0]
-                
-                if len(start_indices) > 0:
-                    energies = audio_features.energy_profile[start_indices]
-                    best_start_idx = start_indices[np.argmax(energies)]
-                    fine_tuned_segment['start'] = frame_times[best_start_idx]
-            
-            # Dostrojenie końca segmentu
-            end_window = 0.3  # 300ms okno wyszukiwania
-            end_candidates = frame_times[
-                (frame_times >= end_time - end_window) & 
-                (frame_times <= end_time + end_window)
-            ]
-            
-            if len(end_candidates) > 0:
-                # Znajdź punkt o najniższej energii w oknie (koniec mowy)
-                end_indices = np.where(
-                    (frame_times >= end_time - end_window) & 
-                    (frame_times <= end_time + end_window)
-                )[0]
-                
-                if len(end_indices) > 0:
-                    energies = audio_features.energy_profile[end_indices]
-                    best_end_idx = end_indices[np.argmin(energies)]
-                    fine_tuned_segment['end'] = frame_times[best_end_idx]
-            
-            # Upewnij się, że koniec jest po początku
-            if fine_tuned_segment['end'] <= fine_tuned_segment['start']:
-                fine_tuned_segment['end'] = fine_tuned_segment['start'] + 0.5
-            
-            fine_tuned_segment['timing_fine_tuned'] = True
-            fine_tuned_segments.append(fine_tuned_segment)
+        # Jeden przebieg zapisu w miejscu
+        for segment, new_start, new_end in zip(segments, new_starts.tolist(), new_ends.tolist()):
+            segment['start'] = new_start
+            segment['end'] = new_end
+            segment['timing_fine_tuned'] = True
         
-        logger.info(f"Dostrojono timing {len(fine_tuned_segments)} segmentów")
-        return fine_tuned_segments
+        logger.info(f"Dostrojono timing {len(segments)} segmentów")
+        return segments
     
     def validate_sync_quality(self, 
                             segments: List[Dict[str, Any]],
@@ -867,7 +1191,7 @@ class AudioSyncManager:
         Returns:
             Raport jakości synchronizacji
         """
-        detected_speech = self.detect_speech_segments(audio_features)
+        detected_speech = self._cached_speech_segments(audio_features)
         
         if not detected_speech or not segments:
             return {
@@ -877,32 +1201,32 @@ class AudioSyncManager:
                 'issues': ['Brak danych do walidacji']
             }
         
+        # Pokrycie z wykrytymi segmentami mowy (posortowane, rozłączne) - wyszukiwanie binarne
+        # zamiast porównywania każdej pary segment/mowa
+        segment_arrays = SegmentBatch.from_dicts(segments)
+        speech_array = np.asarray(detected_speech, dtype=np.float64)
+        coverages = _coverage(
+            segment_arrays.starts, segment_arrays.ends,
+            speech_array[:, 0], speech_array[:, 1]
+        )
+        
         # Oblicz pokrycie
-        total_coverage = 0.0
-        total_segment_duration = 0.0
-        timing_errors = []
-        
-        for segment in segments:
-            start = segment['start']
-            end = segment['end']
-            duration = end - start
-            total_segment_duration += duration
-            
-            # Znajdź pokrycie z wykrytymi segmentami mowy
-            segment_coverage = 0.0
-            for speech_start, speech_end in detected_speech:
-                overlap_start = max(start, speech_start)
-                overlap_end = min(end, speech_end)
-                
-                if overlap_start < overlap_end:
-                    segment_coverage += overlap_end - overlap_start
-            
-            total_coverage += segment_coverage
-            
-            # Sprawdź błędy timingu
-            coverage_ratio = segment_coverage / duration if duration > 0 else 0
-            if coverage_ratio < 0.5:
-                timing_errors.append(f"Segment {start:.1f}-{end:.1f}s: niska synchronizacja ({coverage_ratio:.1%})")
+        durations = segment_arrays.ends - segment_arrays.starts
+        total_coverage = float(coverages.sum())
+        total_segment_duration = float(durations.sum())
+        
+        # Sprawdź błędy timingu - komunikaty tylko dla segmentów z niskim pokryciem
+        safe_durations = np.where(durations > 0, durations, 1.0)
+        coverage_ratios = np.where(durations > 0, coverages / safe_durations, 0.0)
+        low_coverage = coverage_ratios < 0.5
+        timing_errors = [
+            f"Segment {start:.1f}-{end:.1f}s: niska synchronizacja ({ratio:.1%})"
+            for start, end, ratio in zip(
+                segment_arrays.starts[low_coverage].tolist(),
+                segment_arrays.ends[low_coverage].tolist(),
+                coverage_ratios[low_coverage].tolist()
+            )
+        ]
         
         # Oblicz metryki
         overall_coverage = total_coverage / total_segment_duration if total_segment_duration > 0 else 0.0
@@ -925,4 +1249,64 @@ class AudioSyncManager:
             'issues': timing_errors,
             'detected_speech_segments': len(detected_speech),
             'transcript_segments': len(segments)
-        }
\ No newline at end of file
+        }
+
+
+def _analyze_one(audio_path: str, t_start: float, t_end: float) -> Union[str, AudioFeatures]:
+    """
+    Analiza pojedynczego pliku w procesie roboczym
+    
+    Args:
+        audio_path: Ścieżka do pliku audio
+        t_start: Początek analizowanego okna (s)
+        t_end: Koniec analizowanego okna (s)
+        
+    Returns:
+        Ścieżka do wpisu cache (.npz) - tablice nie są serializowane między procesami;
+        same cechy tylko gdy nie trafiły do cache (fallback lub błąd zapisu)
+    """
+    manager = AudioSyncManager()
+    features = manager.analyze_audio_features(audio_path, t_start, t_end)
+    # To samo znormalizowane okno, z którego analyze_audio_features zbudowało klucz cache
+    cache_path = manager._feature_cache_path(audio_path, *manager._analysis_window(t_start, t_end))
+    if cache_path is not None and cache_path.exists():
+        return str(cache_path)
+    return features
+
+
+def analyze_many(paths: List[str], max_workers: Optional[int] = None,
+                 t_start: float = 0.0, t_end: float = 60.0) -> List[AudioFeatures]:
+    """
+    Analizuj cechy audio wielu plików równolegle (jeden proces na plik)
+    
+    Args:
+        paths: Ścieżki do plików audio
+        max_workers: Liczba procesów (domyślnie os.cpu_count())
+        t_start: Początek analizowanego okna (s) - wspólny dla wszystkich plików
+        t_end: Koniec analizowanego okna (s)
+        
+    Returns:
+        Lista AudioFeatures w kolejności ścieżek
+    """
+    if not paths:
+        return []
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = list(executor.map(partial(_analyze_one, t_start=t_start, t_end=t_end), paths))
+    
+    # Wczytaj cechy z cache w procesie nadrzędnym
+    manager = AudioSyncManager()
+    features_list = []
+    for audio_path, result in zip(paths, results):
+        if isinstance(result, AudioFeatures):
+            features_list.append(result)
+            continue
+        
+        features = manager._load_cached_features(Path(result))
+        if features is None:
+            logger.warning(f"Nie można wczytać cech z cache dla {audio_path}, powtarzam analizę")
+            features = manager.analyze_audio_features(audio_path, t_start, t_end)
+        features_list.append(features)
+    
+    logger.info(f"Przeanalizowano cechy audio {len(features_list)} plików")
+    return features_list
@@ -4,11 +4,13 @@ Obsługuje walidację, weryfikację i kontrolę jakości na wszystkich etapach p
 """
 
 import time
+from bisect import bisect_right
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import statistics
+import numpy as np
 
+from .segment_batch import SegmentBatch
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -53,19 +55,67 @@ class QualityReport:
 class QualityController:
     """Kontroler jakości dla całego procesu przetwarzania"""
     
+    # Progi ufności (rosnąco) i odpowiadające im flagi: flaga[i] dla progi[i-1] <= ufność < progi[i]
+    _FLAG_THRESHOLDS = (0.4, 0.6, 0.8, 0.9)
+    _FLAGS = (QualityFlag.FAILED, QualityFlag.POOR, QualityFlag.ACCEPTABLE, QualityFlag.GOOD, QualityFlag.EXCELLENT)
+    
+    # Ogólna jakość raportu (EXCELLENT dodatkowo wymaga przejścia wszystkich walidacji)
+    _REPORT_THRESHOLDS = (0.4, 0.6, 0.8)
+    _REPORT_FLAGS = (QualityFlag.POOR, QualityFlag.ACCEPTABLE, QualityFlag.GOOD, QualityFlag.EXCELLENT)
+    
+    # Szablony komunikatów - formatowane dopiero przy budowie raportu, tylko dla zgłaszanych problemów
+    _ISSUE_FORMATS = {
+        'translation_too_short': "Segment {0}: Tłumaczenie zbyt krótkie (ratio: {1:.2f})",
+        'translation_too_long': "Segment {0}: Tłumaczenie zbyt długie (ratio: {1:.2f})",
+        'translation_empty': "Segment {0}: Puste tłumaczenie",
+        'too_fast': "Segment {0}: Zbyt szybkie napisy ({1:.1f} znaków/s)",
+        'too_slow': "Segment {0}: Zbyt wolne napisy ({1:.1f} znaków/s)",
+        'overlap': "Segment {0}: Nakładanie się z poprzednim segmentem",
+    }
+    
     def __init__(self):
         self.min_confidence_threshold = 0.7
         self.min_segment_duration = 0.5
         self.max_segment_duration = 10.0
         self.max_chars_per_second = 20
         self.min_chars_per_second = 5
+        self.max_issues_report = 50  # Powyżej tego limitu dalsze problemy nie są raportowane
+        
+    def _extract_segment_arrays(self, segments: List[Dict]) -> SegmentBatch:
+        """
+        Przejdź po segmentach raz i zbierz wszystkie pola używane przez walidatory
         
-    def validate_transcription_quality(self, transcript_data: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        Args:
+            segments: Segmenty transkrypcji lub napisów
+            
+        Returns:
+            SegmentBatch z czasami, pewnością, mówiącymi i tekstami
+        """
+        return SegmentBatch.from_dicts(segments, default_confidence=0.0)
+    
+    def _format_issues(self, issues_raw: List[Tuple]) -> List[str]:
+        """
+        Sformatuj surowe problemy (tag, *argumenty) do komunikatów, z limitem raportu
+        
+        Args:
+            issues_raw: Lista krotek (tag, indeks segmentu, wartość...)
+            
+        Returns:
+            Lista komunikatów (maksymalnie max_issues_report + znacznik obcięcia)
+        """
+        issues = [self._ISSUE_FORMATS[tag].format(*args) for tag, *args in issues_raw[:self.max_issues_report]]
+        if len(issues_raw) > self.max_issues_report:
+            issues.append("… i więcej")
+        return issues
+    
+    def validate_transcription_quality(self, transcript_data: Dict[str, Any],
+                                       columns: Optional[SegmentBatch] = None) -> Tuple[bool, List[str]]:
         """
         Waliduj jakość transkrypcji
         
         Args:
             transcript_data: Dane transkrypcji z AssemblyAI
+            columns: Wyekstrahowane pola segmentów (opcjonalnie, unika ponownego przejścia)
             
         Returns:
             Tuple (is_valid, issues_list)
@@ -78,35 +128,24 @@ class QualityController:
             issues.append(f"Niska ogólna pewność transkrypcji: {overall_confidence:.2f}")
         
         # Sprawdź segmenty
-        segments = transcript_data.get('segments', [])
-        if not segments:
+        if columns is None:
+            columns = self._extract_segment_arrays(transcript_data.get('segments', []))
+        if len(columns) == 0:
             issues.append("Brak segmentów w transkrypcji")
             return False, issues
         
-        low_confidence_segments = 0
-        timing_issues = 0
-        
-        for i, segment in enumerate(segments):
-            # Sprawdź pewność segmentu
-            seg_confidence = segment.get('confidence', 0.0)
-            if seg_confidence < self.min_confidence_threshold:
-                low_confidence_segments += 1
-            
-            # Sprawdź timing
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
-            duration = end - start
-            
-            if duration < self.min_segment_duration:
-                timing_issues += 1
-            elif duration > self.max_segment_duration:
-                timing_issues += 1
+        # Sprawdź pewność i timing segmentów
+        durations = columns.durations
+        low_confidence_segments = int(np.count_nonzero(columns.confidences < self.min_confidence_threshold))
+        timing_issues = int(np.count_nonzero(
+            (durations < self.min_segment_duration) | (durations > self.max_segment_duration)
+        ))
         
         # Sprawdź proporcję problemów
-        if low_confidence_segments > len(segments) * 0.3:
-            issues.append(f"Zbyt wiele segmentów o niskiej pewności: {low_confidence_segments}/{len(segments)}")
+        if low_confidence_segments > len(columns) * 0.3:
+            issues.append(f"Zbyt wiele segmentów o niskiej pewności: {low_confidence_segments}/{len(columns)}")
         
-        if timing_issues > len(segments) * 0.2:
+        if timing_issues > len(columns) * 0.2:
             issues.append(f"Problemy z timingiem w {timing_issues} segmentach")
         
         is_valid = len(issues) == 0
@@ -129,8 +168,12 @@ class QualityController:
         if len(original_segments) != len(translated_segments):
             issues.append(f"Niezgodność liczby segmentów: {len(original_segments)} vs {len(translated_segments)}")
         
-        # Sprawdź długość tłumaczeń
+        # Sprawdź długość tłumaczeń (surowe krotki, formatowanie na końcu)
+        issues_raw = []
         for i, (orig, trans) in enumerate(zip(original_segments, translated_segments)):
+            if len(issues_raw) > self.max_issues_report:
+                break
+            
             orig_text = orig.get('text', '')
             trans_text = trans.get('text', '')
             
@@ -138,59 +181,78 @@ class QualityController:
             length_ratio = len(trans_text) / len(orig_text) if len(orig_text) > 0 else 0
             
             if length_ratio < 0.3:
-                issues.append(f"Segment {i}: Tłumaczenie zbyt krótkie (ratio: {length_ratio:.2f})")
+                issues_raw.append(('translation_too_short', i, length_ratio))
             elif length_ratio > 3.0:
-                issues.append(f"Segment {i}: Tłumaczenie zbyt długie (ratio: {length_ratio:.2f})")
+                issues_raw.append(('translation_too_long', i, length_ratio))
             
             # Sprawdź czy tłumaczenie nie jest puste
             if not trans_text.strip():
-                issues.append(f"Segment {i}: Puste tłumaczenie")
+                issues_raw.append(('translation_empty', i))
+        
+        issues.extend(self._format_issues(issues_raw))
         
         is_valid = len(issues) == 0
         return is_valid, issues
     
-    def validate_subtitle_timing(self, segments: List[Dict]) -> Tuple[bool, List[str]]:
+    def validate_subtitle_timing(self, segments: List[Dict],
+                                 columns: Optional[SegmentBatch] = None) -> Tuple[bool, List[str]]:
         """
         Waliduj timing napisów
         
         Args:
             segments: Segmenty z napisami
+            columns: Wyekstrahowane pola segmentów (opcjonalnie, unika ponownego przejścia)
             
         Returns:
             Tuple (is_valid, issues_list)
         """
         issues = []
         
-        for i, segment in enumerate(segments):
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
-            text = segment.get('text', '')
-            
-            duration = end - start
-            chars_per_second = len(text) / duration if duration > 0 else 0
+        # Jeden przebieg po segmentach do tablic, dalsze sprawdzenia wektorowo
+        if columns is None:
+            columns = self._extract_segment_arrays(segments)
+        n = len(columns)
+        starts, ends, text_lens = columns.starts, columns.ends, columns.text_lens
+        
+        durations = columns.durations
+        chars_per_second = np.divide(text_lens, durations, out=np.zeros(n), where=durations > 0)
+        
+        # Sprawdź prędkość czytania
+        too_fast = chars_per_second > self.max_chars_per_second
+        too_slow = ~too_fast & (chars_per_second < self.min_chars_per_second) & (text_lens > 10)
+        
+        # Sprawdź nakładanie się segmentów
+        overlaps = np.zeros(n, dtype=bool)
+        overlaps[1:] = starts[1:] < ends[:-1]
+        
+        # Problemy tylko dla segmentów z flagami (w kolejności segmentów)
+        issues_raw = []
+        for i in np.flatnonzero(too_fast | too_slow | overlaps).tolist():
+            if len(issues_raw) > self.max_issues_report:
+                break
             
-            # Sprawdź prędkość czytania
-            if chars_per_second > self.max_chars_per_second:
-                issues.append(f"Segment {i}: Zbyt szybkie napisy ({chars_per_second:.1f} znaków/s)")
-            elif chars_per_second < self.min_chars_per_second and len(text) > 10:
-                issues.append(f"Segment {i}: Zbyt wolne napisy ({chars_per_second:.1f} znaków/s)")
+            if too_fast[i]:
+                issues_raw.append(('too_fast', i, chars_per_second[i]))
+            elif too_slow[i]:
+                issues_raw.append(('too_slow', i, chars_per_second[i]))
             
-            # Sprawdź nakładanie się segmentów
-            if i > 0:
-                prev_end = segments[i-1].get('end', 0)
-                if start < prev_end:
-                    issues.append(f"Segment {i}: Nakładanie się z poprzednim segmentem")
+            if overlaps[i]:
+                issues_raw.append(('overlap', i))
+        
+        issues = self._format_issues(issues_raw)
         
         is_valid = len(issues) == 0
         return is_valid, issues
     
-    def calculate_confidence_metrics(self, transcript_data: Dict, translation_quality: float = 0.8) -> ConfidenceMetrics:
+    def calculate_confidence_metrics(self, transcript_data: Dict, translation_quality: float = 0.8,
+                                     columns: Optional[SegmentBatch] = None) -> ConfidenceMetrics:
         """
         Oblicz metryki ufności
         
         Args:
             transcript_data: Dane transkrypcji
             translation_quality: Oszacowana jakość tłumaczenia
+            columns: Wyekstrahowane pola segmentów (opcjonalnie, unika ponownego przejścia)
             
         Returns:
             ConfidenceMetrics object
@@ -202,23 +264,17 @@ class QualityController:
         translation_confidence = translation_quality
         
         # Pewność timingu (na podstawie jakości segmentacji)
-        segments = transcript_data.get('segments', [])
-        timing_confidences = []
-        
-        for segment in segments:
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
-            duration = end - start
-            
-            # Wyższa pewność dla segmentów o optymalnej długości
-            if 1.0 <= duration <= 5.0:
-                timing_confidences.append(0.9)
-            elif 0.5 <= duration <= 8.0:
-                timing_confidences.append(0.7)
-            else:
-                timing_confidences.append(0.5)
+        if columns is None:
+            columns = self._extract_segment_arrays(transcript_data.get('segments', []))
+        durations = columns.durations
+        
+        # Wyższa pewność dla segmentów o optymalnej długości
+        timing_confidences = np.where(
+            (durations >= 1.0) & (durations <= 5.0), 0.9,
+            np.where((durations >= 0.5) & (durations <= 8.0), 0.7, 0.5)
+        )
         
-        timing_confidence = statistics.mean(timing_confidences) if timing_confidences else 0.5
+        timing_confidence = float(timing_confidences.mean()) if len(timing_confidences) else 0.5
         
         # Ogólna pewność
         overall_confidence = (transcription_confidence * 0.4 + 
@@ -226,16 +282,7 @@ class QualityController:
                             timing_confidence * 0.2)
         
         # Określ flagę jakości
-        if overall_confidence >= 0.9:
-            quality_flag = QualityFlag.EXCELLENT
-        elif overall_confidence >= 0.8:
-            quality_flag = QualityFlag.GOOD
-        elif overall_confidence >= 0.6:
-            quality_flag = QualityFlag.ACCEPTABLE
-        elif overall_confidence >= 0.4:
-            quality_flag = QualityFlag.POOR
-        else:
-            quality_flag = QualityFlag.FAILED
+        quality_flag = self._FLAGS[bisect_right(self._FLAG_THRESHOLDS, overall_confidence)]
         
         return ConfidenceMetrics(
             transcription_confidence=transcription_confidence,
@@ -245,38 +292,45 @@ class QualityController:
             quality_flag=quality_flag
         )
     
-    def analyze_speakers(self, transcript_data: Dict) -> List[SpeakerInfo]:
+    def analyze_speakers(self, transcript_data: Dict,
+                         columns: Optional[SegmentBatch] = None) -> List[SpeakerInfo]:
         """
         Analizuj informacje o mówiących
         
         Args:
             transcript_data: Dane transkrypcji
+            columns: Wyekstrahowane pola segmentów (opcjonalnie, unika ponownego przejścia)
             
         Returns:
-            Lista informacji o mówiących
+            Lista informacji o mówiących (pusta, gdy w transkrypcji jest mniej niż dwóch mówiących)
         """
+        if columns is None:
+            columns = self._extract_segment_arrays(transcript_data.get('segments', []))
+        
+        # Jeden mówiący (lub brak diaryzacji - wszystko w kubełku 'A') - nie ma czego porównywać
+        if len(set(columns.speakers)) < 2:
+            return []
+        
         speakers = {}
-        segments = transcript_data.get('segments', [])
         
-        for segment in segments:
-            speaker_id = segment.get('speaker', 'A')
-            confidence = segment.get('confidence', 0.0)
-            duration = segment.get('end', 0) - segment.get('start', 0)
-            
+        for speaker_id, confidence, duration in zip(
+            columns.speakers, columns.confidences.tolist(), columns.durations.tolist()
+        ):
             if speaker_id not in speakers:
                 speakers[speaker_id] = {
-                    'confidences': [],
+                    'conf_sum': 0.0,
                     'segments_count': 0,
                     'total_duration': 0.0
                 }
             
-            speakers[speaker_id]['confidences'].append(confidence)
+            # Suma bieżąca zamiast listy pewności - średnia liczona na końcu
+            speakers[speaker_id]['conf_sum'] += confidence
             speakers[speaker_id]['segments_count'] += 1
             speakers[speaker_id]['total_duration'] += duration
         
         speaker_info_list = []
         for speaker_id, data in speakers.items():
-            avg_confidence = statistics.mean(data['confidences']) if data['confidences'] else 0.0
+            avg_confidence = data['conf_sum'] / data['segments_count'] if data['segments_count'] else 0.0
             
             speaker_info_list.append(SpeakerInfo(
                 speaker_id=speaker_id,
@@ -304,27 +358,27 @@ class QualityController:
         Returns:
             QualityReport object
         """
-        # Walidacje
-        trans_valid, trans_issues = self.validate_transcription_quality(transcript_data)
+        # Jednokrotna ekstrakcja pól segmentów, współdzielona przez walidatory
         orig_segments = transcript_data.get('segments', [])
+        transcript_columns = self._extract_segment_arrays(orig_segments)
+        
+        # Walidacje
+        trans_valid, trans_issues = self.validate_transcription_quality(transcript_data, transcript_columns)
         transl_valid, transl_issues = self.validate_translation_quality(orig_segments, translated_segments)
         timing_valid, timing_issues = self.validate_subtitle_timing(translated_segments)
         
         # Metryki ufności
-        confidence_metrics = self.calculate_confidence_metrics(transcript_data)
+        confidence_metrics = self.calculate_confidence_metrics(transcript_data, columns=transcript_columns)
         
         # Analiza mówiących
-        speaker_analysis = self.analyze_speakers(transcript_data)
+        speaker_analysis = self.analyze_speakers(transcript_data, transcript_columns)
         
         # Określ ogólną jakość
-        if all([trans_valid, transl_valid, timing_valid]) and confidence_metrics.overall_confidence >= 0.8:
-            overall_quality = QualityFlag.EXCELLENT
-        elif confidence_metrics.overall_confidence >= 0.6:
+        overall_confidence = confidence_metrics.overall_confidence
+        all_valid = trans_valid and transl_valid and timing_valid
+        overall_quality = self._REPORT_FLAGS[bisect_right(self._REPORT_THRESHOLDS, overall_confidence)]
+        if overall_quality is QualityFlag.EXCELLENT and not all_valid:
             overall_quality = QualityFlag.GOOD
-        elif confidence_metrics.overall_confidence >= 0.4:
-            overall_quality = QualityFlag.ACCEPTABLE
-        else:
-            overall_quality = QualityFlag.POOR
         
         # Rekomendacje
         recommendations = []
@@ -334,7 +388,7 @@ class QualityController:
             recommendations.append("Sprawdź ustawienia tłumaczenia lub wybierz inny język")
         if not timing_valid:
             recommendations.append("Dostosuj parametry segmentacji czasowej")
-        if confidence_metrics.overall_confidence < 0.6:
+        if overall_confidence < 0.6:
             recommendations.append("Rozważ ręczną weryfikację wyników")
         
         return QualityReport(
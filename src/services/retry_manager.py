@@ -5,15 +5,22 @@ Obsługuje automatyczne ponowne przetwarzanie segmentów i synchronizację modu
 
 import time
 import asyncio
-from typing import Dict, Any, List, Optional, Callable, Tuple
-from dataclasses import dataclass
+import functools
+import random
+from typing import Dict, Any, List, Optional, Callable, Tuple, Deque
+from dataclasses import dataclass, field
+from collections import deque, OrderedDict
 from enum import Enum
-import statistics
+import numpy as np
 
+from ..utils.jit import njit
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Pola wymagane w wyniku transkrypcji (sprawdzane jednym porównaniem zbiorów)
+_TRANSCRIPTION_FIELDS = frozenset(('text', 'segments', 'confidence'))
+
 class RetryReason(Enum):
     """Powody ponownych prób"""
     LOW_CONFIDENCE = "low_confidence"
@@ -23,7 +30,7 @@ class RetryReason(Enum):
     TIMING_MISMATCH = "timing_mismatch"
     TRANSLATION_ERROR = "translation_error"
 
-@dataclass
+@dataclass(frozen=True)
 class RetryConfig:
     """Konfiguracja ponownych prób"""
     max_retries: int = 3
@@ -33,7 +40,98 @@ class RetryConfig:
     confidence_threshold: float = 0.7
     timeout_seconds: float = 300.0
 
+@njit(cache=True)
+def _resolve_overlaps(starts: np.ndarray, ends: np.ndarray, durations: np.ndarray, min_gap: float):
+    """
+    Rozsuń nakładające się segmenty (w miejscu)
+    
+    Segment zaczynający się przed końcem poprzedniego przesuwany jest za niego
+    z zachowaniem przerwy min_gap i własnej długości - zależność od poprzedniego
+    końca wymusza jedno sekwencyjne przejście.
+    
+    Args:
+        starts: Czasy rozpoczęcia
+        ends: Czasy zakończenia
+        durations: Długości segmentów
+        min_gap: Przerwa po przesunięciu (s)
+    """
+    for i in range(1, starts.shape[0]):
+        if starts[i] < ends[i - 1]:
+            starts[i] = ends[i - 1] + min_gap
+            ends[i] = starts[i] + durations[i]
+
+class QualityCheckError(Exception):
+    """Wynik operacji nie spełnia kryteriów jakości"""
+
+class NonRetryableError(Exception):
+    """Błąd deterministyczny - ponowna próba nie zmieni wyniku"""
+
+# Błędy kończące ponawianie od razu. Serwisy opakowują błędy API w ogólny Exception,
+# dlatego ponawiane jest wszystko poza jawnie deterministycznymi błędami.
+_NON_RETRYABLE = (NonRetryableError, TypeError, AttributeError, NotImplementedError)
+
+def is_retryable(error: Exception) -> bool:
+    """Czy po tym błędzie warto ponowić operację"""
+    return not isinstance(error, _NON_RETRYABLE)
+
 @dataclass
+class FailurePatterns:
+    """Historia wyników jednej operacji - podstawa adaptacyjnej polityki ponownych prób"""
+    success: int = 0
+    timeout: int = 0
+    api_error: int = 0
+    quality_fail: int = 0
+    ema_latency: float = 0.0
+    last_reason: Optional[RetryReason] = None
+    recent: deque = field(default_factory=lambda: deque(maxlen=10))  # True - próba udana
+    
+    # Mnożniki opóźnienia: błędy API (limity zapytań) wymagają dłuższej przerwy,
+    # odrzucony wynik zwykle nie poprawi się od samego czekania
+    _DELAY_MULTIPLIERS = {
+        RetryReason.API_ERROR: 3.0,
+        RetryReason.QUALITY_CHECK_FAILED: 0.5,
+    }
+    
+    def record_success(self, latency: float, alpha: float = 0.2):
+        """Zapisz udaną próbę i zaktualizuj średnią wykładniczą czasu wykonania"""
+        self.success += 1
+        self.ema_latency = latency if self.success == 1 else alpha * latency + (1 - alpha) * self.ema_latency
+        self.last_reason = None
+        self.recent.append(True)
+    
+    def record_failure(self, reason: RetryReason):
+        """Zapisz nieudaną próbę"""
+        if reason == RetryReason.TIMEOUT:
+            self.timeout += 1
+        elif reason == RetryReason.QUALITY_CHECK_FAILED:
+            self.quality_fail += 1
+        else:
+            self.api_error += 1
+        self.last_reason = reason
+        self.recent.append(False)
+    
+    def retry_multiplier(self) -> float:
+        """Mnożnik opóźnienia dla ostatniego rodzaju błędu"""
+        return self._DELAY_MULTIPLIERS.get(self.last_reason, 1.0)
+    
+    def recommended_max_retries(self, max_retries: int) -> int:
+        """
+        Limit ponownych prób na podstawie ostatnich wyników
+        
+        Args:
+            max_retries: Limit z konfiguracji
+            
+        Returns:
+            Zalecana liczba ponownych prób
+        """
+        # Ostatnie próby bez ani jednego sukcesu - operacja prawdopodobnie trwale zepsuta
+        if len(self.recent) == self.recent.maxlen and not any(self.recent):
+            return min(1, max_retries)
+        if self.last_reason == RetryReason.QUALITY_CHECK_FAILED:
+            return max(1, max_retries - 1)
+        return max_retries
+
+@dataclass(frozen=True)
 class DelayCompensation:
     """Kompensacja opóźnień między modułami"""
     transcription_delay: float = 0.0
@@ -41,13 +139,51 @@ class DelayCompensation:
     processing_delay: float = 0.0
     total_compensation: float = 0.0
 
+class _RetryRecord:
+    """Wpis historii ponownych prób (__slots__ - bez słownika atrybutów na wpis)"""
+    __slots__ = ('operation', 'status', 'timestamp_ns', 'execution_ns', 'retry_count', 'error', 'attempt')
+    
+    def __init__(self, operation: str, status: str, timestamp_ns: int, execution_ns: Optional[int] = None,
+                 retry_count: Optional[int] = None, error: Optional[str] = None,
+                 attempt: Optional[int] = None):
+        self.operation = operation
+        self.status = status
+        self.timestamp_ns = timestamp_ns  # Zegar monotoniczny - odczyt przekazany przez wywołującego
+        self.execution_ns = execution_ns
+        self.retry_count = retry_count
+        self.error = error
+        self.attempt = attempt  # Numer nieudanej próby lub łączna liczba prób przy porażce
+
 class RetryManager:
     """Menedżer ponownych prób i korekty opóźnień"""
     
+    HISTORY_LIMIT = 10_000           # Wpisy _RetryRecord (kilka MB przy pełnej historii)
+    DELAY_MEASUREMENTS_LIMIT = 4096  # Ostatnie pomiary opóźnień modułów
+    
     def __init__(self, config: RetryConfig = None):
         self.config = config or RetryConfig()
-        self.retry_history: List[Dict] = []
-        self.delay_measurements: List[float] = []
+        # Historia ograniczona - najstarsze wpisy usuwane w O(1); statystyki liczą liczniki
+        self.retry_history: Deque[_RetryRecord] = deque(maxlen=self.HISTORY_LIMIT)
+        self.delay_measurements: Deque[float] = deque(maxlen=self.DELAY_MEASUREMENTS_LIMIT)
+        
+        # Liczniki statystyk aktualizowane przy zapisie - bez przeszukiwania historii
+        self._n_success = 0
+        self._n_fail_final = 0
+        self._sum_exec_ns = 0
+        self._sum_retry_count = 0
+        self._sum_delay = 0.0
+        self._n_delay = 0
+        self._ema_delay = 0.0  # Wykładnicza średnia opóźnień modułów
+        self._ema_alpha = 0.1
+        self._rng = random.Random()  # Własny generator - bez współdzielenia globalnego RNG
+        self._patterns: Dict[str, FailurePatterns] = {}
+        
+        # Walidatory wyników per operacja (brak wpisu - każdy wynik poza None jest akceptowany)
+        self._validators: Dict[str, Callable[[Any], bool]] = {
+            "transcription": self._validate_transcription_result,
+            "translation": self._validate_translation_result,
+            "subtitle_generation": self._validate_subtitle_result,
+        }
         
     async def execute_with_retry(self, 
                                 operation: Callable,
@@ -67,59 +203,109 @@ class RetryManager:
         """
         retry_count = 0
         last_exception = None
+        delay = self.config.base_delay  # Stan jittera - osobny dla każdego wywołania
+        max_retries = self._max_retries_for(operation_name)
         
-        for attempt in range(self.config.max_retries + 1):
+        # Rodzaj operacji sprawdzany raz; synchroniczne wykonywane w puli wątków (nie blokują pętli zdarzeń)
+        is_coro = asyncio.iscoroutinefunction(operation)
+        if not is_coro:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(operation, *args, **kwargs)
+        
+        for attempt in range(max_retries + 1):
             try:
-                start_time = time.time()
+                start_ns = time.monotonic_ns()
                 
                 # Wykonaj operację
-                if asyncio.iscoroutinefunction(operation):
+                if is_coro:
                     result = await operation(*args, **kwargs)
                 else:
-                    result = operation(*args, **kwargs)
+                    result = await loop.run_in_executor(None, call)
                 
-                execution_time = time.time() - start_time
+                end_ns = time.monotonic_ns()
+                execution_ns = end_ns - start_ns
                 
                 # Sprawdź jakość wyniku
                 if self._validate_result_quality(result, operation_name):
                     logger.info(f"{operation_name} zakończona pomyślnie po {attempt + 1} próbach")
-                    self._record_successful_attempt(operation_name, execution_time, retry_count)
+                    self._record_successful_attempt(operation_name, execution_ns, retry_count, end_ns)
                     return result, retry_count
                 else:
-                    raise Exception(f"Wynik operacji {operation_name} nie spełnia kryteriów jakości")
+                    raise QualityCheckError(f"Wynik operacji {operation_name} nie spełnia kryteriów jakości")
                     
             except Exception as e:
                 last_exception = e
                 retry_count += 1
+                self._note_failure(operation_name, e)
                 
                 logger.warning(f"{operation_name} - próba {attempt + 1} nieudana: {str(e)}")
                 
-                if attempt < self.config.max_retries:
-                    delay = self._calculate_retry_delay(attempt)
-                    logger.info(f"Ponowna próba za {delay:.1f} sekund...")
-                    
-                    self._record_failed_attempt(operation_name, str(e), attempt + 1)
-                    
-                    if asyncio.iscoroutinefunction(operation):
-                        await asyncio.sleep(delay)
-                    else:
-                        time.sleep(delay)
-                else:
+                if not is_retryable(e):
+                    logger.error(f"{operation_name} - błąd niepodlegający ponowieniu")
+                    break
+                
+                # Ostatnia próba - bez liczenia opóźnienia, od razu do zapisu porażki
+                if attempt >= max_retries:
                     logger.error(f"{operation_name} - wszystkie próby wyczerpane")
+                    break
+                
+                delay = self._calculate_retry_delay(delay, operation_name)
+                logger.info(f"Ponowna próba za {delay:.1f} sekund...")
+                
+                self._record_failed_attempt(operation_name, str(e), attempt + 1, start_ns)
+                await asyncio.sleep(delay)
         
         # Wszystkie próby nieudane
-        self._record_final_failure(operation_name, str(last_exception), retry_count)
+        self._record_final_failure(operation_name, str(last_exception), retry_count, start_ns)
         raise Exception(f"Operacja {operation_name} nieudana po {retry_count} próbach: {last_exception}")
     
-    def _calculate_retry_delay(self, attempt: int) -> float:
-        """Oblicz opóźnienie przed ponowną próbą"""
+    def _calculate_retry_delay(self, last_delay: float, operation_name: Optional[str] = None) -> float:
+        """
+        Oblicz opóźnienie przed ponowną próbą
+        
+        Backoff z "decorrelated jitter": losowe opóźnienie z zakresu
+        [base_delay, 3 * poprzednie opóźnienie], dzięki czemu równoległe
+        ponowienia nie trafiają w API jednocześnie. Wynik skalowany jest
+        mnożnikiem wynikającym z historii błędów operacji.
+        
+        Args:
+            last_delay: Poprzednie opóźnienie (base_delay przed pierwszą ponowną próbą)
+            operation_name: Nazwa operacji (None - bez adaptacji)
+            
+        Returns:
+            Opóźnienie w sekundach
+        """
         if self.config.exponential_backoff:
-            delay = self.config.base_delay * (2 ** attempt)
+            delay = self._rng.uniform(self.config.base_delay, last_delay * 3)
         else:
             delay = self.config.base_delay
         
+        patterns = self._patterns.get(operation_name)
+        if patterns is not None:
+            delay *= patterns.retry_multiplier()
+        
         return min(delay, self.config.max_delay)
     
+    def _max_retries_for(self, operation_name: str) -> int:
+        """Limit ponownych prób dla operacji (konfiguracja ograniczona historią błędów)"""
+        patterns = self._patterns.get(operation_name)
+        if patterns is None:
+            return self.config.max_retries
+        return patterns.recommended_max_retries(self.config.max_retries)
+    
+    def _classify_failure(self, error: Exception) -> RetryReason:
+        """Przypisz wyjątek do powodu ponownej próby"""
+        if isinstance(error, QualityCheckError):
+            return RetryReason.QUALITY_CHECK_FAILED
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            return RetryReason.TIMEOUT
+        return RetryReason.API_ERROR
+    
+    def _note_failure(self, operation_name: str, error: Exception):
+        """Zapisz nieudaną próbę w historii błędów operacji"""
+        patterns = self._patterns.setdefault(operation_name, FailurePatterns())
+        patterns.record_failure(self._classify_failure(error))
+    
     def _validate_result_quality(self, result: Any, operation_name: str) -> bool:
         """
         Waliduj jakość wyniku operacji
@@ -134,14 +320,8 @@ class RetryManager:
         if result is None:
             return False
         
-        if operation_name == "transcription":
-            return self._validate_transcription_result(result)
-        elif operation_name == "translation":
-            return self._validate_translation_result(result)
-        elif operation_name == "subtitle_generation":
-            return self._validate_subtitle_result(result)
-        
-        return True
+        validator = self._validators.get(operation_name)
+        return validator is None or validator(result)
     
     def _validate_transcription_result(self, result: Dict) -> bool:
         """Waliduj wynik transkrypcji"""
@@ -149,8 +329,7 @@ class RetryManager:
             return False
         
         # Sprawdź czy ma wymagane pola
-        required_fields = ['text', 'segments', 'confidence']
-        if not all(field in result for field in required_fields):
+        if not _TRANSCRIPTION_FIELDS <= result.keys():
             return False
         
         # Sprawdź pewność
@@ -207,6 +386,12 @@ class RetryManager:
         """
         delay = end_time - start_time
         self.delay_measurements.append(delay)
+        if self._n_delay:
+            self._ema_delay += self._ema_alpha * (delay - self._ema_delay)
+        else:
+            self._ema_delay = delay
+        self._sum_delay += delay
+        self._n_delay += 1
         
         logger.debug(f"Opóźnienie modułu {module_name}: {delay:.2f}s")
     
@@ -225,8 +410,8 @@ class RetryManager:
         Returns:
             DelayCompensation object
         """
-        # Oblicz średnie opóźnienia z historii
-        avg_delay = statistics.mean(self.delay_measurements) if self.delay_measurements else 0.0
+        # Średnie opóźnienie z historii (wykładnicza, aktualizowana przy każdym pomiarze)
+        avg_delay = self._ema_delay
         
         # Kompensacja dla każdego modułu
         transcription_compensation = max(0, transcription_time - avg_delay * 0.3)
@@ -247,77 +432,65 @@ class RetryManager:
     
     def adjust_segment_timing(self, 
                             segments: List[Dict], 
-                            compensation: DelayCompensation) -> List[Dict]:
+                            compensation: DelayCompensation,
+                            inplace: bool = True) -> List[Dict]:
         """
         Dostosuj timing segmentów na podstawie kompensacji opóźnień
         
+        Domyślnie modyfikuje przekazane słowniki (pola 'start', 'end',
+        'timing_adjusted') i zwraca tę samą listę.
+        
         Args:
             segments: Lista segmentów
             compensation: Kompensacja opóźnień
+            inplace: Modyfikuj segmenty w miejscu; False - płytkie kopie tworzone raz na wejściu
             
         Returns:
             Lista segmentów z dostosowanym timingiem
         """
-        adjusted_segments = []
+        n = len(segments)
         
         # Oblicz współczynnik korekty
         correction_factor = 1.0 - (compensation.total_compensation * 0.01)  # Maksymalnie 1% korekty
         
-        for segment in segments:
-            adjusted_segment = segment.copy()
-            
-            # Dostosuj czasy z kompensacją
-            original_start = segment.get('start', 0)
-            original_end = segment.get('end', 0)
-            
-            adjusted_start = original_start * correction_factor
-            adjusted_end = original_end * correction_factor
-            
-            # Upewnij się, że segmenty nie nakładają się
-            if adjusted_segments:
-                prev_end = adjusted_segments[-1].get('end', 0)
-                if adjusted_start < prev_end:
-                    adjusted_start = prev_end + 0.1  # 100ms przerwy
-                    adjusted_end = adjusted_start + (original_end - original_start)
-            
-            adjusted_segment['start'] = adjusted_start
-            adjusted_segment['end'] = adjusted_end
-            adjusted_segment['timing_adjusted'] = True
-            
-            adjusted_segments.append(adjusted_segment)
+        # Arytmetyka na tablicach zamiast odczytów ze słowników w pętli
+        original_starts = np.fromiter((s.get('start', 0) for s in segments), dtype=np.float64, count=n)
+        original_ends = np.fromiter((s.get('end', 0) for s in segments), dtype=np.float64, count=n)
+        adjusted_starts = original_starts * correction_factor
+        adjusted_ends = original_ends * correction_factor
+        
+        # Upewnij się, że segmenty nie nakładają się (100ms przerwy)
+        _resolve_overlaps(adjusted_starts, adjusted_ends, original_ends - original_starts, 0.1)
+        
+        adjusted_segments = segments if inplace else list(map(dict, segments))
+        for segment, adjusted_start, adjusted_end in zip(
+            adjusted_segments, adjusted_starts.tolist(), adjusted_ends.tolist()
+        ):
+            segment['start'] = adjusted_start
+            segment['end'] = adjusted_end
+            segment['timing_adjusted'] = True
         
         logger.info(f"Dostosowano timing {len(adjusted_segments)} segmentów")
         return adjusted_segments
     
-    def _record_successful_attempt(self, operation: str, execution_time: float, retry_count: int):
-        """Zapisz udaną próbę"""
-        self.retry_history.append({
-            'operation': operation,
-            'status': 'success',
-            'execution_time': execution_time,
-            'retry_count': retry_count,
-            'timestamp': time.time()
-        })
-    
-    def _record_failed_attempt(self, operation: str, error: str, attempt: int):
+    def _record_successful_attempt(self, operation: str, execution_ns: int, retry_count: int, now_ns: int):
+        """Zapisz udaną próbę (czasy w nanosekundach zegara monotonicznego)"""
+        self._patterns.setdefault(operation, FailurePatterns()).record_success(execution_ns / 1e9)
+        self._n_success += 1
+        self._sum_exec_ns += execution_ns
+        self._sum_retry_count += retry_count
+        self.retry_history.append(_RetryRecord(
+            operation, 'success', now_ns, execution_ns=execution_ns, retry_count=retry_count
+        ))
+    
+    def _record_failed_attempt(self, operation: str, error: str, attempt: int, now_ns: int):
         """Zapisz nieudaną próbę"""
-        self.retry_history.append({
-            'operation': operation,
-            'status': 'failed_attempt',
-            'error': error,
-            'attempt': attempt,
-            'timestamp': time.time()
-        })
-    
-    def _record_final_failure(self, operation: str, error: str, total_attempts: int):
+        self.retry_history.append(_RetryRecord(operation, 'failed_attempt', now_ns, error=error, attempt=attempt))
+    
+    def _record_final_failure(self, operation: str, error: str, total_attempts: int, now_ns: int):
         """Zapisz ostateczną porażkę"""
-        self.retry_history.append({
-            'operation': operation,
-            'status': 'final_failure',
-            'error': error,
-            'total_attempts': total_attempts,
-            'timestamp': time.time()
-        })
+        self._n_fail_final += 1
+        self.retry_history.append(_RetryRecord(operation, 'final_failure', now_ns, error=error, attempt=total_attempts))
     
     def get_retry_statistics(self) -> Dict[str, Any]:
         """
@@ -329,88 +502,186 @@ class RetryManager:
         if not self.retry_history:
             return {}
         
-        total_operations = len([h for h in self.retry_history if h['status'] in ['success', 'final_failure']])
-        successful_operations = len([h for h in self.retry_history if h['status'] == 'success'])
-        failed_operations = len([h for h in self.retry_history if h['status'] == 'final_failure'])
-        
-        success_rate = (successful_operations / total_operations * 100) if total_operations > 0 else 0
-        
-        # Średni czas wykonania
-        execution_times = [h['execution_time'] for h in self.retry_history if 'execution_time' in h]
-        avg_execution_time = statistics.mean(execution_times) if execution_times else 0
+        total_operations = self._n_success + self._n_fail_final
+        success_rate = (self._n_success / total_operations * 100) if total_operations > 0 else 0
         
-        # Średnia liczba ponownych prób
-        retry_counts = [h['retry_count'] for h in self.retry_history if 'retry_count' in h]
-        avg_retry_count = statistics.mean(retry_counts) if retry_counts else 0
+        # Czas wykonania i liczba ponownych prób zapisywane są tylko dla udanych operacji
+        avg_execution_time = self._sum_exec_ns / self._n_success / 1e9 if self._n_success else 0
+        avg_retry_count = self._sum_retry_count / self._n_success if self._n_success else 0
         
         return {
             'total_operations': total_operations,
-            'successful_operations': successful_operations,
-            'failed_operations': failed_operations,
+            'successful_operations': self._n_success,
+            'failed_operations': self._n_fail_final,
             'success_rate': success_rate,
             'average_execution_time': avg_execution_time,
             'average_retry_count': avg_retry_count,
-            'total_delay_measurements': len(self.delay_measurements),
-            'average_delay': statistics.mean(self.delay_measurements) if self.delay_measurements else 0
+            'total_delay_measurements': self._n_delay,
+            'average_delay': self._sum_delay / self._n_delay if self._n_delay else 0
         }
 
 class SegmentReprocessor:
     """Klasa do ponownego przetwarzania problematycznych segmentów"""
     
-    def __init__(self, retry_manager: RetryManager):
+    def __init__(self, retry_manager: RetryManager, translation_cache_size: int = 4096):
         self.retry_manager = retry_manager
         
+        # Cache LRU ponownych tłumaczeń: (tekst źródłowy, język docelowy) -> tłumaczenie
+        self._tx_cache: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
+        self._tx_cache_size = translation_cache_size
+        
+        # Trwające tłumaczenia per klucz cache - duplikaty czekają na to samo zadanie
+        self._tx_inflight: Dict[Tuple[str, str], 'asyncio.Future[str]'] = {}
+    
+    @staticmethod
+    def _translation_key(text: str, target_language: str) -> Tuple[str, str]:
+        """Klucz cache - tekst bez białych znaków na brzegach (wielkość liter ma znaczenie dla tłumaczenia)"""
+        return text.strip(), target_language
+    
+    def get_cached_translation(self, text: str, target_language: str) -> Optional[str]:
+        """
+        Pobierz wcześniejsze tłumaczenie tego samego tekstu
+        
+        Args:
+            text: Tekst źródłowy
+            target_language: Język docelowy
+            
+        Returns:
+            Tłumaczenie lub None
+        """
+        key = self._translation_key(text, target_language)
+        translation = self._tx_cache.get(key)
+        if translation is not None:
+            self._tx_cache.move_to_end(key)
+        return translation
+    
+    def cache_translation(self, text: str, target_language: str, translation: str):
+        """Zapisz tłumaczenie w cache (najdawniej używany wpis jest usuwany po przepełnieniu)"""
+        key = self._translation_key(text, target_language)
+        self._tx_cache[key] = translation
+        self._tx_cache.move_to_end(key)
+        if len(self._tx_cache) > self._tx_cache_size:
+            self._tx_cache.popitem(last=False)
+    
+    def invalidate_translation(self, text: str, target_language: str):
+        """Usuń tłumaczenie z cache"""
+        self._tx_cache.pop(self._translation_key(text, target_language), None)
+        
     async def reprocess_low_confidence_segments(self, 
                                               segments: List[Dict],
                                               transcription_service,
                                               translation_service,
-                                              confidence_threshold: float = 0.6) -> List[Dict]:
+                                              confidence_threshold: float = 0.6,
+                                              concurrency_limit: int = 8) -> List[Dict]:
         """
         Ponownie przetwórz segmenty o niskiej pewności
         
+        Segmenty przetwarzane są współbieżnie, najwyżej concurrency_limit
+        zapytań do serwisu tłumaczenia naraz.
+        
         Args:
             segments: Lista segmentów
             transcription_service: Serwis transkrypcji
             translation_service: Serwis tłumaczenia
             confidence_threshold: Próg pewności
+            concurrency_limit: Maksymalna liczba równoczesnych tłumaczeń
             
         Returns:
             Lista przetworzonych segmentów
         """
-        reprocessed_segments = []
+        semaphore = asyncio.Semaphore(concurrency_limit)
+        
+        tasks = [
+            self._reprocess_one(i, segment, translation_service, semaphore)
+            for i, segment in enumerate(segments)
+            if segment.get('confidence', 1.0) < confidence_threshold
+        ]
+        # Segmenty modyfikowane są w miejscu - kolejność listy zachowana bez sortowania
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return list(segments)
+    
+    async def _reprocess_one(self, i: int, segment: Dict, translation_service, semaphore: asyncio.Semaphore):
+        """
+        Ponownie przetwórz pojedynczy segment (w miejscu)
+        
+        Args:
+            i: Indeks segmentu (do logowania)
+            segment: Segment do przetworzenia
+            translation_service: Serwis tłumaczenia
+            semaphore: Ogranicznik współbieżności
+        """
+        confidence = segment.get('confidence', 1.0)
+        logger.info(f"Ponowne przetwarzanie segmentu {i} (pewność: {confidence:.2f})")
         
-        for i, segment in enumerate(segments):
-            confidence = segment.get('confidence', 1.0)
+        try:
+            # Ponowna transkrypcja z wyższą jakością
+            # (w rzeczywistej implementacji wymagałoby to ponownej ekstrakcji audio dla segmentu)
             
-            if confidence < confidence_threshold:
-                logger.info(f"Ponowne przetwarzanie segmentu {i} (pewność: {confidence:.2f})")
+            # Ponowne tłumaczenie
+            original_text = segment.get('text', '')
+            target_language = segment.get('target_language', 'PL')
+            if original_text:
+                retranslated = await self._shared_translation(
+                    original_text, target_language, translation_service, semaphore
+                )
                 
-                try:
-                    # Ponowna transkrypcja z wyższą jakością
-                    # (w rzeczywistej implementacji wymagałoby to ponownej ekstrakcji audio dla segmentu)
-                    
-                    # Ponowne tłumaczenie
-                    original_text = segment.get('text', '')
-                    if original_text:
-                        retranslated = await self.retry_manager.execute_with_retry(
-                            translation_service.translate_text,
-                            "segment_retranslation",
-                            original_text,
-                            target_language=segment.get('target_language', 'PL')
-                        )
-                        
-                        segment['text'] = retranslated[0]  # retranslated is (result, retry_count)
-                        segment['reprocessed'] = True
-                        segment['original_confidence'] = confidence
-                        segment['confidence'] = min(confidence + 0.2, 1.0)  # Zwiększ pewność
-                
-                except Exception as e:
-                    logger.error(f"Błąd podczas ponownego przetwarzania segmentu {i}: {e}")
-                    segment['reprocessing_failed'] = True
-            
-            reprocessed_segments.append(segment)
+                segment['text'] = retranslated
+                segment['reprocessed'] = True
+                segment['original_confidence'] = confidence
+                segment['confidence'] = min(confidence + 0.2, 1.0)  # Zwiększ pewność
+        
+        except Exception as e:
+            logger.error(f"Błąd podczas ponownego przetwarzania segmentu {i}: {e}")
+            segment['reprocessing_failed'] = True
+            self.invalidate_translation(segment.get('text', ''), segment.get('target_language', 'PL'))
+    
+    async def _shared_translation(self, text: str, target_language: str,
+                                  translation_service, semaphore: asyncio.Semaphore) -> str:
+        """
+        Tłumaczenie z cache lub z jednego wspólnego zadania dla tego samego tekstu
+        
+        Segmenty startują jednocześnie, więc sam cache nie wystarcza - duplikat
+        sprawdzający go przed końcem pierwszego tłumaczenia dołącza do trwającego
+        zadania zamiast wysyłać własne zapytanie.
         
-        return reprocessed_segments
+        Args:
+            text: Tekst źródłowy
+            target_language: Język docelowy
+            translation_service: Serwis tłumaczenia
+            semaphore: Ogranicznik współbieżności
+            
+        Returns:
+            Tłumaczenie
+        """
+        cached = self.get_cached_translation(text, target_language)
+        if cached is not None:
+            return cached
+        
+        key = self._translation_key(text, target_language)
+        task = self._tx_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._translate_uncached(text, target_language, translation_service, semaphore)
+            )
+            self._tx_inflight[key] = task
+            task.add_done_callback(lambda _: self._tx_inflight.pop(key, None))
+        
+        # shield - anulowanie jednego oczekującego nie przerywa tłumaczenia pozostałym
+        return await asyncio.shield(task)
+    
+    async def _translate_uncached(self, text: str, target_language: str,
+                                  translation_service, semaphore: asyncio.Semaphore) -> str:
+        """Przetłumacz tekst (z ograniczeniem współbieżności) i zapisz wynik w cache"""
+        async with semaphore:
+            translation, _ = await self.retry_manager.execute_with_retry(
+                translation_service.translate_text,
+                "segment_retranslation",
+                text,
+                target_language=target_language
+            )
+        self.cache_translation(text, target_language, translation)
+        return translation
     
     def identify_problematic_segments(self, segments: List[Dict]) -> List[int]:
         """
@@ -424,40 +695,41 @@ class SegmentReprocessor:
         """
         problematic = []
         
-        for i, segment in enumerate(segments):
+        # Jednorazowy odczyt pól do list - pętla działa na lokalnych wartościach
+        starts = [segment.get('start', 0) for segment in segments]
+        ends = [segment.get('end', 0) for segment in segments]
+        texts = [segment.get('text', '') for segment in segments]
+        confidences = [segment.get('confidence', 1.0) for segment in segments]
+        prev_end = None
+        
+        for i, (start, end, text, confidence) in enumerate(zip(starts, ends, texts, confidences)):
             issues = []
             
             # Sprawdź pewność
-            confidence = segment.get('confidence', 1.0)
             if confidence < 0.6:
                 issues.append('low_confidence')
             
             # Sprawdź długość
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
             duration = end - start
-            
             if duration < 0.3:
                 issues.append('too_short')
             elif duration > 15.0:
                 issues.append('too_long')
             
             # Sprawdź tekst
-            text = segment.get('text', '')
             if not text.strip():
                 issues.append('empty_text')
             elif len(text) < 3:
                 issues.append('very_short_text')
             
             # Sprawdź timing
-            if i > 0:
-                prev_end = segments[i-1].get('end', 0)
-                if start < prev_end:
-                    issues.append('timing_overlap')
+            if prev_end is not None and start < prev_end:
+                issues.append('timing_overlap')
+            prev_end = end
             
             if issues:
                 problematic.append(i)
-                segment['issues'] = issues
+                segments[i]['issues'] = issues
         
         logger.info(f"Zidentyfikowano {len(problematic)} problematycznych segmentów")
         return problematic
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Wspólny kolumnowy (SoA) układ segmentów
+Zastępuje listy słowników w obliczeniach synchronizacji i kontroli jakości
+"""
+
+import numpy as np
+from typing import Dict, Any, List
+from dataclasses import dataclass
+from operator import itemgetter
+
+# Jednoczesny odczyt pól segmentu (szybka ścieżka, gdy wszystkie klucze istnieją)
+_segment_fields = itemgetter('start', 'end', 'confidence', 'text', 'speaker')
+
+@dataclass
+class SegmentBatch:
+    """Segmenty w układzie kolumnowym: równoległe tablice NumPy i listy dla pól tekstowych"""
+    starts: np.ndarray
+    ends: np.ndarray
+    confidences: np.ndarray
+    speakers: List[Any]
+    texts: List[str]
+    
+    @classmethod
+    def from_dicts(cls, segments: List[Dict[str, Any]], default_confidence: float = 1.0) -> 'SegmentBatch':
+        """
+        Zbuduj kolumny z listy segmentów (jedno przejście po słownikach)
+        
+        Args:
+            segments: Lista segmentów
+            default_confidence: Pewność dla segmentów bez pola 'confidence'
+        
+        Returns:
+            SegmentBatch
+        """
+        n = len(segments)
+        starts = np.empty(n)
+        ends = np.empty(n)
+        confidences = np.empty(n)
+        speakers = []
+        texts = []
+        
+        for i, segment in enumerate(segments):
+            try:
+                start, end, confidence, text, speaker = _segment_fields(segment)
+            except KeyError:
+                start = segment.get('start', 0)
+                end = segment.get('end', 0)
+                confidence = segment.get('confidence', default_confidence)
+                text = segment.get('text', '')
+                speaker = segment.get('speaker', 'A')
+            
+            starts[i] = start
+            ends[i] = end
+            confidences[i] = confidence
+            speakers.append(speaker)
+            texts.append(text)
+        
+        return cls(starts, ends, confidences, speakers, texts)
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Zamień kolumny z powrotem na listę słowników (zgodność z API)
+        
+        Returns:
+            Lista segmentów
+        """
+        return [
+            {'start': start, 'end': end, 'confidence': confidence, 'speaker': speaker, 'text': text}
+            for start, end, confidence, speaker, text in zip(
+                self.starts.tolist(), self.ends.tolist(), self.confidences.tolist(), self.speakers, self.texts
+            )
+        ]
+    
+    @property
+    def durations(self) -> np.ndarray:
+        return self.ends - self.starts
+    
+    @property
+    def text_lens(self) -> np.ndarray:
+        return np.fromiter(map(len, self.texts), dtype=np.int64, count=len(self.texts))
+    
+    def __len__(self) -> int:
+        return len(self.starts)
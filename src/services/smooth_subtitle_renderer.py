@@ -3,15 +3,71 @@ Renderer napisów bez migotania z wysoką jakością
 Eliminuje migotanie i poprawia płynność wyświetlania napisów
 """
 
+import io
 import numpy as np
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple
 from dataclasses import dataclass
 import re
+from functools import lru_cache
+from operator import itemgetter
 
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Naturalne miejsca podziału bloków: interpunkcja w słowie i spójnik jako następne słowo
+_PUNCT_RE = re.compile(r'[.!?,;:]')
+_CONJ_SET = frozenset(('i', 'a', 'ale', 'oraz', 'lub', 'bo', 'że', 'gdy', 'jeśli'))
+
+_GET_WORD = itemgetter('word')
+
+def _join_words(words: List[Dict]) -> str:
+    """Tekst grupy słów rozdzielony spacjami (słowa bez pola 'word' jako pusty tekst)"""
+    try:
+        return " ".join(map(_GET_WORD, words))
+    except KeyError:
+        return " ".join([w.get('word', '') for w in words])
+
+# Gotowy blok napisu: (start, koniec, tekst)
+TextBlock = Tuple[float, float, str]
+
+# Zapas na błąd reprezentacji float przy zamianie sekund na ms/cs (np. 0.57 * 100 = 56.99999...)
+_UNIT_EPS = 1e-6
+
+@lru_cache(maxsize=65536)
+def _srt_timestamp(total_ms: int) -> str:
+    """Timestamp SRT (HH:MM:SS,mmm) z liczby milisekund - powtarzające się czasy z cache"""
+    total_secs, milliseconds = divmod(total_ms, 1000)
+    total_mins, secs = divmod(total_secs, 60)
+    hours, minutes = divmod(total_mins, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+def _srt_timestamps(seconds: List[float]) -> List[str]:
+    """Timestampy SRT dla całej listy czasów - zamiana na ms jedną operacją na tablicy"""
+    total_ms = (np.asarray(seconds, dtype=np.float64) * 1000 + _UNIT_EPS).astype(np.int64)
+    return list(map(_srt_timestamp, total_ms.tolist()))
+
+@lru_cache(maxsize=65536)
+def _ass_timestamp(total_cs: int) -> str:
+    """Timestamp ASS (H:MM:SS.cc) z liczby setnych sekundy"""
+    total_secs, centiseconds = divmod(total_cs, 100)
+    total_mins, secs = divmod(total_secs, 60)
+    hours, minutes = divmod(total_mins, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+# Nagłówek ASS - uzupełniany parametrami stylu z konfiguracji
+_ASS_HEADER_TEMPLATE = """[Script Info]
+Title: High Quality Subtitles
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,{font_size},&Hffffff,&Hffffff,&H000000,&H80000000,1,0,0,0,100,100,0,0,1,{outline_width},{shadow_offset},2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
 @dataclass
 class SmoothSubtitleConfig:
     """Konfiguracja płynnych napisów"""
@@ -29,6 +85,7 @@ class SmoothSubtitleRenderer:
     
     def __init__(self, config: SmoothSubtitleConfig = None):
         self.config = config or SmoothSubtitleConfig()
+        self._ass_header_cache: Dict[Tuple[int, int, int], str] = {}
         
     def generate_smooth_srt(self, word_segments: List[Dict], display_mode: str = "smooth_progressive") -> str:
         """
@@ -67,7 +124,11 @@ class SmoothSubtitleRenderer:
         Returns:
             Zawartość SRT
         """
-        srt_content = []
+        start_times = []
+        end_times = []
+        texts = []
+        # Powtarzające się frazy (wtrącenia, refreny) dzielą jeden obiekt str do zapisu pliku
+        shared_texts = {}
         subtitle_index = 1
         
         for segment in word_segments:
@@ -78,14 +139,8 @@ class SmoothSubtitleRenderer:
             # Grupuj słowa w stabilne bloki
             stable_blocks = self._create_stable_blocks(words)
             
-            for block in stable_blocks:
-                # Każdy blok to grupa słów wyświetlanych razem
-                display_text = " ".join([w.get('word', '') for w in block])
-                
-                # Oblicz timing z nakładaniem
-                start_time = block[0].get('start', 0)
-                end_time = block[-1].get('end', 0)
-                
+            # Każdy blok to grupa słów wyświetlanych razem
+            for start_time, end_time, display_text in stable_blocks:
                 # Przedłuż wyświetlanie dla stabilności
                 extended_end = max(end_time, start_time + self.config.min_display_duration)
                 
@@ -93,16 +148,15 @@ class SmoothSubtitleRenderer:
                 if subtitle_index < len(stable_blocks):
                     extended_end += self.config.overlap_duration
                 
-                srt_content.append(str(subtitle_index))
-                srt_content.append(f"{self._format_timestamp(start_time)} --> {self._format_timestamp(extended_end)}")
-                srt_content.append(self._format_text_with_styling(display_text))
-                srt_content.append("")
+                start_times.append(start_time)
+                end_times.append(extended_end)
+                texts.append(shared_texts.setdefault(display_text, display_text))
                 
                 subtitle_index += 1
         
-        return '\n'.join(srt_content)
+        return self._write_srt(start_times, end_times, texts)
     
-    def _create_stable_blocks(self, words: List[Dict]) -> List[List[Dict]]:
+    def _create_stable_blocks(self, words: List[Dict]) -> List[TextBlock]:
         """
         Stwórz stabilne bloki słów eliminujące migotanie
         
@@ -110,75 +164,92 @@ class SmoothSubtitleRenderer:
             words: Lista słów
             
         Returns:
-            Lista bloków słów
+            Lista bloków (start, koniec, tekst)
         """
         if not words:
             return []
         
-        blocks = []
-        current_block = []
-        
-        for i, word in enumerate(words):
-            current_block.append(word)
+        starts, ends, texts = self._segment_to_soa(words)
+        break_mask = self._natural_break_mask(starts, ends, texts)
+        
+        # Końce bloków: naturalne przerwy, a w dłuższych odcinkach co max_words słów
+        max_words = max(1, self.config.max_words_per_line)
+        block_ends = []
+        run_start = 0
+        for break_idx in np.flatnonzero(break_mask).tolist():
+            block_ends.extend(range(run_start + max_words - 1, break_idx, max_words))
+            block_ends.append(break_idx)
+            run_start = break_idx + 1
+        
+        # Zakresy słów [pierwsze, ostatnie] - tekst i czasy liczone dopiero po scaleniu
+        ranges = []
+        block_start = 0
+        for end_idx in block_ends:
+            # Sprawdź czy blok jest wystarczająco długi
+            block_duration = ends[end_idx] - starts[block_start]
             
-            # Sprawdź czy zakończyć blok
-            should_end_block = (
-                len(current_block) >= self.config.max_words_per_line or  # Maksymalna długość
-                i == len(words) - 1 or  # Ostatnie słowo
-                self._is_natural_break_point(word, words[i+1] if i+1 < len(words) else None)  # Naturalna przerwa
-            )
+            if block_duration >= self.config.stability_threshold or end_idx - block_start >= 2 or not ranges:
+                # Pierwszy blok zachowywany nawet jeśli krótki
+                ranges.append([block_start, end_idx])
+            else:
+                # Dodaj do poprzedniego bloku jeśli za krótki
+                ranges[-1][1] = end_idx
             
-            if should_end_block:
-                # Sprawdź czy blok jest wystarczająco długi
-                block_duration = current_block[-1].get('end', 0) - current_block[0].get('start', 0)
-                
-                if block_duration >= self.config.stability_threshold or len(current_block) >= 3:
-                    blocks.append(current_block.copy())
-                    current_block = []
-                elif blocks:
-                    # Dodaj do poprzedniego bloku jeśli za krótki
-                    blocks[-1].extend(current_block)
-                    current_block = []
-                else:
-                    # Pierwszy blok - zachowaj nawet jeśli krótki
-                    blocks.append(current_block.copy())
-                    current_block = []
-        
-        return blocks
+            block_start = end_idx + 1
+        
+        start_list = starts.tolist()
+        end_list = ends.tolist()
+        return [
+            (start_list[first], end_list[last], " ".join(texts[first:last + 1]))
+            for first, last in ranges
+        ]
     
-    def _is_natural_break_point(self, current_word: Dict, next_word: Optional[Dict]) -> bool:
+    def _segment_to_soa(self, words: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """
-        Sprawdź czy to naturalne miejsce na przerwę
+        Rozłóż słowa na kolumny (jeden odczyt pól na słowo)
         
         Args:
-            current_word: Aktualne słowo
-            next_word: Następne słowo
+            words: Lista słów
             
         Returns:
-            True jeśli to dobre miejsce na przerwę
+            Tuple (starts, ends, texts)
         """
-        if not next_word:
-            return True
-        
-        current_text = current_word.get('word', '').lower()
-        next_text = next_word.get('word', '').lower()
-        
-        # Przerwa po znakach interpunkcyjnych
-        if any(punct in current_text for punct in ['.', '!', '?', ',', ';', ':']):
-            return True
-        
-        # Przerwa przed spójnikami
-        if next_text in ['i', 'a', 'ale', 'oraz', 'lub', 'bo', 'że', 'gdy', 'jeśli']:
-            return True
-        
-        # Przerwa po długiej pauzie
-        current_end = current_word.get('end', 0)
-        next_start = next_word.get('start', 0)
+        n = len(words)
+        starts = np.fromiter((w.get('start', 0) for w in words), dtype=np.float64, count=n)
+        ends = np.fromiter((w.get('end', 0) for w in words), dtype=np.float64, count=n)
+        texts = [w.get('word', '') for w in words]
+        return starts, ends, texts
+    
+    def _natural_break_mask(self, starts: np.ndarray, ends: np.ndarray, texts: List[str]) -> np.ndarray:
+        """
+        Maska naturalnych przerw po każdym słowie
         
-        if next_start - current_end > 0.3:  # 300ms pauzy
-            return True
+        Blok można zakończyć po słowie, gdy:
+        - słowo zawiera znak interpunkcyjny (.!?,;:),
+        - następne słowo jest spójnikiem (i, a, ale, oraz, lub, bo, że, gdy, jeśli),
+        - przerwa do następnego słowa przekracza 300ms,
+        - jest to ostatnie słowo segmentu.
         
-        return False
+        Args:
+            starts: Czasy rozpoczęcia słów
+            ends: Czasy zakończenia słów
+            texts: Teksty słów
+            
+        Returns:
+            Tablica bool - True gdy po słowie można zakończyć blok
+        """
+        n = len(texts)
+        break_mask = np.empty(n, dtype=bool)
+        break_mask[-1] = True  # Ostatnie słowo zawsze kończy blok
+        
+        # Przerwa po długiej pauzie (300ms), po interpunkcji lub przed spójnikiem
+        pauses = starts[1:] - ends[:-1] > 0.3
+        punctuation = np.fromiter((_PUNCT_RE.search(text) is not None for text in texts[:-1]), dtype=bool, count=n - 1)
+        conjunctions = np.fromiter((text.lower() in _CONJ_SET for text in texts[1:]), dtype=bool, count=n - 1)
+        np.logical_or(pauses, punctuation, out=break_mask[:-1])
+        break_mask[:-1] |= conjunctions
+        
+        return break_mask
     
     def _generate_stable_blocks(self, word_segments: List[Dict]) -> str:
         """
@@ -190,8 +261,10 @@ class SmoothSubtitleRenderer:
         Returns:
             Zawartość SRT
         """
-        srt_content = []
-        subtitle_index = 1
+        start_times = []
+        end_times = []
+        texts = []
+        shared_texts = {}
         
         for segment in word_segments:
             words = segment.get('words', [])
@@ -201,26 +274,40 @@ class SmoothSubtitleRenderer:
             # Podziel na większe, stabilne bloki
             blocks = self._create_larger_blocks(words, min_words=3, max_words=6)
             
-            for block in blocks:
-                display_text = " ".join([w.get('word', '') for w in block])
-                
-                start_time = block[0].get('start', 0)
-                end_time = block[-1].get('end', 0)
-                
+            for start_time, end_time, display_text in blocks:
                 # Zapewnij minimalną długość wyświetlania
                 min_end = start_time + self.config.min_display_duration * 2  # Dłużej dla stabilności
-                end_time = max(end_time, min_end)
                 
-                srt_content.append(str(subtitle_index))
-                srt_content.append(f"{self._format_timestamp(start_time)} --> {self._format_timestamp(end_time)}")
-                srt_content.append(self._format_text_with_styling(display_text))
-                srt_content.append("")
-                
-                subtitle_index += 1
+                start_times.append(start_time)
+                end_times.append(max(end_time, min_end))
+                texts.append(shared_texts.setdefault(display_text, display_text))
         
-        return '\n'.join(srt_content)
+        return self._write_srt(start_times, end_times, texts)
     
-    def _create_larger_blocks(self, words: List[Dict], min_words: int = 3, max_words: int = 6) -> List[List[Dict]]:
+    def _write_srt(self, start_times: List[float], end_times: List[float], texts: List[str]) -> str:
+        """
+        Zapisz bloki jako SRT, formatując wszystkie timestampy wsadowo
+        
+        Args:
+            start_times: Czasy rozpoczęcia bloków
+            end_times: Czasy zakończenia bloków
+            texts: Teksty bloków (przed stylizacją)
+            
+        Returns:
+            Zawartość SRT
+        """
+        srt_content = io.StringIO()
+        separator = ''  # Pusta linia między napisami
+        
+        for subtitle_index, (start_ts, end_ts, text) in enumerate(
+            zip(_srt_timestamps(start_times), _srt_timestamps(end_times), texts), 1
+        ):
+            srt_content.write(f"{separator}{subtitle_index}\n{start_ts} --> {end_ts}\n{self._format_text_with_styling(text)}\n")
+            separator = '\n'
+        
+        return srt_content.getvalue()
+    
+    def _create_larger_blocks(self, words: List[Dict], min_words: int = 3, max_words: int = 6) -> List[TextBlock]:
         """
         Stwórz większe bloki słów dla stabilności
         
@@ -230,27 +317,21 @@ class SmoothSubtitleRenderer:
             max_words: Maksymalna liczba słów w bloku
             
         Returns:
-            Lista bloków
+            Lista bloków (start, koniec, tekst)
         """
-        blocks = []
-        current_block = []
-        
-        for word in words:
-            current_block.append(word)
-            
-            if len(current_block) >= max_words:
-                blocks.append(current_block.copy())
-                current_block = []
-        
-        # Dodaj ostatni blok
-        if current_block:
-            if len(current_block) >= min_words or not blocks:
-                blocks.append(current_block)
-            else:
-                # Dodaj do poprzedniego bloku jeśli za mały
-                blocks[-1].extend(current_block)
-        
-        return blocks
+        # Pełne bloki po max_words słów; początek ostatniego (niepełnego) bloku
+        bounds = list(range(0, len(words), max_words))
+        bounds.append(len(words))
+        
+        # Dodaj do poprzedniego bloku jeśli ostatni za mały
+        remainder = len(words) % max_words
+        if remainder and remainder < min_words and len(bounds) > 2:
+            del bounds[-2]
+        
+        return [
+            (words[first].get('start', 0), words[last - 1].get('end', 0), _join_words(words[first:last]))
+            for first, last in zip(bounds, bounds[1:])
+        ]
     
     def _generate_fade_transitions(self, word_segments: List[Dict]) -> str:
         """
@@ -262,7 +343,8 @@ class SmoothSubtitleRenderer:
         Returns:
             Zawartość SRT z efektami fade
         """
-        srt_content = []
+        srt_content = io.StringIO()
+        separator = ''  # Pusta linia między napisami
         subtitle_index = 1
         
         for segment in word_segments:
@@ -274,7 +356,7 @@ class SmoothSubtitleRenderer:
             overlapping_groups = self._create_overlapping_groups(words)
             
             for group in overlapping_groups:
-                display_text = " ".join([w.get('word', '') for w in group])
+                display_text = _join_words(group)
                 
                 start_time = group[0].get('start', 0) - self.config.fade_duration
                 end_time = group[-1].get('end', 0) + self.config.fade_duration
@@ -282,14 +364,12 @@ class SmoothSubtitleRenderer:
                 # Dodaj efekty fade w formacie ASS (jeśli obsługiwane)
                 styled_text = self._add_fade_effects(display_text)
                 
-                srt_content.append(str(subtitle_index))
-                srt_content.append(f"{self._format_timestamp(max(0, start_time))} --> {self._format_timestamp(end_time)}")
-                srt_content.append(styled_text)
-                srt_content.append("")
+                srt_content.write(f"{separator}{subtitle_index}\n{self._format_timestamp(max(0, start_time))} --> {self._format_timestamp(end_time)}\n{styled_text}\n")
+                separator = '\n'
                 
                 subtitle_index += 1
         
-        return '\n'.join(srt_content)
+        return srt_content.getvalue()
     
     def _create_overlapping_groups(self, words: List[Dict]) -> List[List[Dict]]:
         """
@@ -301,16 +381,11 @@ class SmoothSubtitleRenderer:
         Returns:
             Lista grup z nakładaniem
         """
-        groups = []
         group_size = 4
         overlap = 2
         
-        for i in range(0, len(words), group_size - overlap):
-            group = words[i:i + group_size]
-            if group:
-                groups.append(group)
-        
-        return groups
+        # Każdy start i < len(words), więc wycinek nigdy nie jest pusty
+        return [words[i:i + group_size] for i in range(0, len(words), group_size - overlap)]
     
     def _format_text_with_styling(self, text: str) -> str:
         """
@@ -323,6 +398,7 @@ class SmoothSubtitleRenderer:
             Sformatowany tekst
         """
         # Podstawowe formatowanie dla lepszej czytelności
+        # (strip() zwraca ten sam obiekt, gdy nie ma czego usuwać - bez kopii)
         styled_text = text.strip()
         
         # Usuń automatyczne dodawanie tagów HTML <b></b>
@@ -357,12 +433,7 @@ class SmoothSubtitleRenderer:
         Returns:
             Sformatowany timestamp
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds - int(seconds)) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+        return _srt_timestamp(int(seconds * 1000 + _UNIT_EPS))
     
     def _fallback_generation(self, word_segments: List[Dict]) -> str:
         """
@@ -374,7 +445,8 @@ class SmoothSubtitleRenderer:
         Returns:
             Podstawowe napisy SRT
         """
-        srt_content = []
+        srt_content = io.StringIO()
+        separator = ''  # Pusta linia między napisami
         subtitle_index = 1
         
         for segment in word_segments:
@@ -382,18 +454,16 @@ class SmoothSubtitleRenderer:
             if not words:
                 continue
             
-            text = " ".join([w.get('word', '') for w in words])
+            text = _join_words(words)
             start_time = words[0].get('start', 0)
             end_time = words[-1].get('end', 0)
             
-            srt_content.append(str(subtitle_index))
-            srt_content.append(f"{self._format_timestamp(start_time)} --> {self._format_timestamp(end_time)}")
-            srt_content.append(text)
-            srt_content.append("")
+            srt_content.write(f"{separator}{subtitle_index}\n{self._format_timestamp(start_time)} --> {self._format_timestamp(end_time)}\n{text}\n")
+            separator = '\n'
             
             subtitle_index += 1
         
-        return '\n'.join(srt_content)
+        return srt_content.getvalue()
     
     def generate_high_quality_ass(self, word_segments: List[Dict]) -> str:
         """
@@ -405,54 +475,38 @@ class SmoothSubtitleRenderer:
         Returns:
             Zawartość pliku ASS
         """
-        ass_header = f"""[Script Info]
-Title: High Quality Subtitles
-ScriptType: v4.00+
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,{self.config.font_size},&Hffffff,&Hffffff,&H000000,&H80000000,1,0,0,0,100,100,0,0,1,{self.config.outline_width},{self.config.shadow_offset},2,10,10,10,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
+        ass_content = io.StringIO()
+        ass_content.write(self._ass_header())
         
-        ass_content = [ass_header]
+        # Efekt fade dla płynności - ten sam dla wszystkich linii
+        fade_ms = int(self.config.fade_duration * 1000)
+        fade_tag = f"{{\\fad({fade_ms},{fade_ms})}}"
         
-        # Generuj płynne napisy w formacie ASS
-        stable_blocks = []
+        # Generuj płynne napisy w formacie ASS - bloki kolejnych segmentów zapisywane od razu
         for segment in word_segments:
-            words = segment.get('words', [])
-            if words:
-                blocks = self._create_stable_blocks(words)
-                stable_blocks.extend(blocks)
-        
-        for block in stable_blocks:
-            display_text = " ".join([w.get('word', '') for w in block])
-            start_time = block[0].get('start', 0)
-            end_time = block[-1].get('end', 0)
-            
-            # Przedłuż dla stabilności
-            end_time = max(end_time, start_time + self.config.min_display_duration)
-            
-            start_ass = self._format_ass_timestamp(start_time)
-            end_ass = self._format_ass_timestamp(end_time)
-            
-            # Dodaj efekty fade dla płynności
-            fade_in = int(self.config.fade_duration * 1000)
-            fade_out = int(self.config.fade_duration * 1000)
-            
-            text_with_effects = f"{{\\fad({fade_in},{fade_out})}}{display_text}"
-            
-            ass_content.append(f"Dialogue: 0,{start_ass},{end_ass},Default,,0,0,0,,{text_with_effects}")
+            for start_time, end_time, display_text in self._create_stable_blocks(segment.get('words', [])):
+                # Przedłuż dla stabilności
+                end_time = max(end_time, start_time + self.config.min_display_duration)
+                
+                start_ass = self._format_ass_timestamp(start_time)
+                end_ass = self._format_ass_timestamp(end_time)
+                
+                ass_content.write(f"\nDialogue: 0,{start_ass},{end_ass},Default,,0,0,0,,{fade_tag}{display_text}")
         
-        return '\n'.join(ass_content)
+        return ass_content.getvalue()
+    
+    def _ass_header(self) -> str:
+        """Nagłówek ASS dla bieżących parametrów stylu (budowany raz na zestaw parametrów)"""
+        key = (self.config.font_size, self.config.outline_width, self.config.shadow_offset)
+        header = self._ass_header_cache.get(key)
+        if header is None:
+            font_size, outline_width, shadow_offset = key
+            header = _ASS_HEADER_TEMPLATE.format(
+                font_size=font_size, outline_width=outline_width, shadow_offset=shadow_offset
+            )
+            self._ass_header_cache[key] = header
+        return header
     
     def _format_ass_timestamp(self, seconds: float) -> str:
         """Formatuj timestamp dla ASS"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centiseconds = int((seconds - int(seconds)) * 100)
-        
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
\ No newline at end of file
+        return _ass_timestamp(int(seconds * 100 + _UNIT_EPS))
\ No newline at end of file
@@ -2,16 +2,90 @@
 Serwis do generowania napisów w różnych formatach
 """
 
+import io
 import re
-from typing import List, Dict, Any
-from datetime import timedelta
+import numpy as np
+from itertools import chain
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
+from functools import lru_cache
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Koniec zdania: znaki .!? i następujące po nich białe znaki
+_SENTENCE_END_RE = re.compile(r'[.!?]+\s+')
+
+# Stały nagłówek plików ASS
+_ASS_HEADER = """[Script Info]
+Title: Generated Subtitles
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,2,0,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+# Gotowy wpis napisów: (start, koniec, tekst)
+SubtitleEntry = Tuple[float, float, str]
+
+# Zapas na błąd reprezentacji float przy zamianie sekund na ms/cs (np. 0.57 * 100 = 56.99999...)
+_UNIT_EPS = 1e-6
+
+def _decompose(total_units: int, units_per_second: int) -> Tuple[int, int, int, int]:
+    """Rozłóż czas w całkowitych jednostkach (ms, cs) na (godziny, minuty, sekundy, reszta)"""
+    total_secs, fraction = divmod(total_units, units_per_second)
+    total_mins, secs = divmod(total_secs, 60)
+    hours, minutes = divmod(total_mins, 60)
+    return hours, minutes, secs, fraction
+
+@lru_cache(maxsize=65536)
+def _ms_timestamp(total_ms: int, separator: str) -> str:
+    """Timestamp HH:MM:SS<sep>mmm z liczby milisekund (SRT: ',', VTT: '.') - z cache"""
+    hours, minutes, secs, milliseconds = _decompose(total_ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+@lru_cache(maxsize=65536)
+def _cs_timestamp(total_cs: int) -> str:
+    """Timestamp ASS H:MM:SS.cc z liczby setnych sekundy - z cache"""
+    hours, minutes, secs, centiseconds = _decompose(total_cs, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+def _concat(parts: Iterable[str], separator: str = '', streamed: bool = False) -> str:
+    """
+    Połącz fragmenty wyjścia
+    
+    Args:
+        parts: Fragmenty (np. kolejne wpisy napisów)
+        separator: Tekst wstawiany między fragmentami
+        streamed: Zapisuj do io.StringIO zamiast str.join - join jest szybszy,
+            ale najpierw trzyma wszystkie fragmenty w liście
+        
+    Returns:
+        Połączony tekst
+    """
+    if not streamed:
+        return separator.join(parts)
+    
+    buffer = io.StringIO()
+    write = buffer.write
+    parts = iter(parts)
+    for part in parts:
+        write(part)
+        break
+    for part in parts:
+        write(separator)
+        write(part)
+    return buffer.getvalue()
+
 class SubtitleGenerator:
     """Klasa do generowania napisów w różnych formatach"""
     
+    # Liczba segmentów, od której wyjście zapisywane jest strumieniowo (io.StringIO)
+    STREAM_THRESHOLD = 5000
+    
     def __init__(self):
         self.supported_formats = ['SRT', 'VTT', 'ASS']
     
@@ -35,19 +109,19 @@ class SubtitleGenerator:
             Zawartość pliku z napisami
         """
         try:
-            # Podziel przetłumaczony tekst na segmenty
-            subtitle_segments = self._align_translation_with_segments(segments, translated_text)
+            # Dopasuj tekst do segmentów i podziel długie linie w jednym przejściu
+            subtitle_segments = self._align_and_wrap(segments, translated_text, max_chars_per_line)
             
-            # Podziel długie linie
-            subtitle_segments = self._split_long_lines(subtitle_segments, max_chars_per_line)
+            # Długie transkrypcje zapisywane strumieniowo, bez listy wszystkich wpisów
+            streamed = len(segments) > self.STREAM_THRESHOLD
             
             # Generuj napisy w odpowiednim formacie
             if format.upper() == 'SRT':
-                return self._generate_srt(subtitle_segments)
+                return self._generate_srt(subtitle_segments, streamed)
             elif format.upper() == 'VTT':
-                return self._generate_vtt(subtitle_segments)
+                return self._generate_vtt(subtitle_segments, streamed)
             elif format.upper() == 'ASS':
-                return self._generate_ass(subtitle_segments)
+                return self._generate_ass(subtitle_segments, streamed)
             else:
                 raise ValueError(f"Nieobsługiwany format: {format}")
                 
@@ -55,11 +129,43 @@ class SubtitleGenerator:
             logger.error(f"Błąd podczas generowania napisów: {e}")
             raise
     
+    def _align_and_wrap(
+        self, 
+        segments: List[Dict[str, Any]], 
+        translated_text: str,
+        max_chars_per_line: int
+    ) -> Iterator[SubtitleEntry]:
+        """
+        Dopasuj przetłumaczony tekst do segmentów czasowych i podziel długie linie
+        
+        Args:
+            segments: Segmenty z timestampami
+            translated_text: Przetłumaczony tekst
+            max_chars_per_line: Maksymalna liczba znaków w linii
+            
+        Returns:
+            Generator wpisów (start, koniec, tekst) gotowych do zapisu
+        """
+        starts, ends, sentences = self._align_translation_with_segments(segments, translated_text)
+        
+        # Zdania są już bez skrajnych białych znaków (strip w _split_into_sentences, split w _redistribute_text)
+        for start_time, end_time, text in zip(starts, ends, sentences):
+            if len(text) <= max_chars_per_line:
+                yield start_time, end_time, text
+                continue
+            
+            # Podziel długi tekst na linie, dzieląc czas segmentu po równo
+            lines = self._wrap_text(text, max_chars_per_line)
+            time_per_line = (end_time - start_time) / len(lines)
+            
+            for i, line in enumerate(lines):
+                yield start_time + (i * time_per_line), start_time + ((i + 1) * time_per_line), line
+    
     def _align_translation_with_segments(
         self, 
         segments: List[Dict[str, Any]], 
         translated_text: str
-    ) -> List[Dict[str, Any]]:
+    ) -> Tuple[List[float], List[float], List[str]]:
         """
         Dopasuj przetłumaczony tekst do segmentów czasowych
         
@@ -68,7 +174,7 @@ class SubtitleGenerator:
             translated_text: Przetłumaczony tekst
             
         Returns:
-            Lista segmentów z przetłumaczonym tekstem
+            Krotka (początki, końce, zdania) - po jednym elemencie na segment
         """
         # Podziel przetłumaczony tekst na zdania
         sentences = self._split_into_sentences(translated_text)
@@ -78,41 +184,37 @@ class SubtitleGenerator:
             logger.warning(f"Liczba zdań ({len(sentences)}) nie odpowiada liczbie segmentów ({len(segments)})")
             sentences = self._redistribute_text(translated_text, len(segments))
         
-        # Stwórz nowe segmenty z przetłumaczonym tekstem
-        aligned_segments = []
-        for i, segment in enumerate(segments):
-            if i < len(sentences):
-                start_time = segment.get('start', 0)
-                end_time = segment.get('end', 0)
-                text = sentences[i].strip()
-                
-                # Dodaj minimalny czas wyświetlania dla czytelności (minimum 1.5s)
-                min_duration = 1.5
-                if (end_time - start_time) < min_duration:
-                    # Sprawdź czy można przedłużyć bez nakładania na następny segment
-                    if i < len(segments) - 1:
-                        next_start = segments[i + 1].get('start', 0)
-                        max_end = next_start - 0.3  # 0.3s przerwy
-                        end_time = min(start_time + min_duration, max_end)
-                    else:
-                        end_time = start_time + min_duration
-                
-                aligned_segments.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'text': text
-                })
+        # Czasy liczone na tablicach
+        n = len(segments)
+        starts = np.fromiter((segment.get('start', 0) for segment in segments), dtype=np.float64, count=n)
+        ends = np.fromiter((segment.get('end', 0) for segment in segments), dtype=np.float64, count=n)
+        
+        # Dodaj minimalny czas wyświetlania dla czytelności (minimum 1.5s),
+        # bez nakładania na następny segment (0.3s przerwy); ostatni segment bez ograniczenia
+        min_duration = 1.5
+        max_ends = np.empty(n)
+        np.subtract(starts[1:], 0.3, out=max_ends[:-1])
+        max_ends[-1:] = np.inf
+        extended_ends = np.minimum(starts + min_duration, max_ends)
+        ends = np.where(ends - starts < min_duration, extended_ends, ends)
         
-        return aligned_segments
+        return starts.tolist(), ends.tolist(), sentences
     
     def _split_into_sentences(self, text: str) -> List[str]:
         """Podziel tekst na zdania"""
-        # Użyj regex do podziału na zdania
-        sentence_endings = r'[.!?]+\s+'
-        sentences = re.split(sentence_endings, text)
+        sentences = []
         
-        # Usuń puste zdania
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Jedno przejście po końcach zdań - wycinki tekstu bez listy pośredniej
+        prev = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            sentence = text[prev:match.start()].strip()
+            if sentence:  # Pomiń puste zdania
+                sentences.append(sentence)
+            prev = match.end()
+        
+        sentence = text[prev:].strip()
+        if sentence:
+            sentences.append(sentence)
         
         return sentences
     
@@ -122,160 +224,73 @@ class SubtitleGenerator:
         words = text.split()
         words_per_segment = len(words) // num_segments
         
-        segments = []
-        for i in range(num_segments):
-            start_idx = i * words_per_segment
-            if i == num_segments - 1:  # Ostatni segment - weź wszystkie pozostałe słowa
-                end_idx = len(words)
-            else:
-                end_idx = (i + 1) * words_per_segment
-            
-            segment_text = ' '.join(words[start_idx:end_idx])
-            segments.append(segment_text)
+        # Granice co words_per_segment słów; ostatni segment bierze wszystkie pozostałe słowa
+        bounds = [i * words_per_segment for i in range(num_segments)]
+        bounds.append(len(words))
         
-        return segments
-    
-    def _split_long_lines(
-        self, 
-        segments: List[Dict[str, Any]], 
-        max_chars_per_line: int
-    ) -> List[Dict[str, Any]]:
-        """Podziel długie linie na krótsze"""
-        result_segments = []
-        
-        for segment in segments:
-            text = segment['text']
-            
-            if len(text) <= max_chars_per_line:
-                result_segments.append(segment)
-                continue
-            
-            # Podziel długi tekst na linie
-            lines = self._wrap_text(text, max_chars_per_line)
-            
-            # Oblicz czas trwania dla każdej linii
-            duration = segment['end'] - segment['start']
-            time_per_line = duration / len(lines)
-            
-            for i, line in enumerate(lines):
-                new_segment = {
-                    'start': segment['start'] + (i * time_per_line),
-                    'end': segment['start'] + ((i + 1) * time_per_line),
-                    'text': line
-                }
-                result_segments.append(new_segment)
-        
-        return result_segments
+        return [' '.join(words[start_idx:end_idx]) for start_idx, end_idx in zip(bounds, bounds[1:])]
     
     def _wrap_text(self, text: str, max_chars: int) -> List[str]:
         """Zawiń tekst do określonej długości linii"""
         words = text.split()
         lines = []
-        current_line = []
-        current_length = 0
         
-        for word in words:
-            word_length = len(word)
-            
-            # Sprawdź czy dodanie słowa nie przekroczy limitu
-            if current_length + word_length + len(current_line) <= max_chars:
-                current_line.append(word)
-                current_length += word_length
-            else:
-                # Zakończ obecną linię i rozpocznij nową
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-                current_length = word_length
+        # Zachłannie: linia words[line_start:i] ma długość line_length (słowa + spacje między nimi)
+        line_start = 0
+        line_length = -1
+        for i, word in enumerate(words):
+            # Słowo dłuższe niż limit - osobna linia (nie dzielimy słów)
+            if line_length + 1 + len(word) > max_chars and i > line_start:
+                lines.append(' '.join(words[line_start:i]))
+                line_start = i
+                line_length = -1
+            line_length += 1 + len(word)
         
-        # Dodaj ostatnią linię
-        if current_line:
-            lines.append(' '.join(current_line))
+        if words:
+            lines.append(' '.join(words[line_start:]))
         
         return lines
     
-    def _generate_srt(self, segments: List[Dict[str, Any]]) -> str:
+    def _generate_srt(self, segments: Iterable[SubtitleEntry], streamed: bool = False) -> str:
         """Generuj napisy w formacie SRT"""
-        srt_content = []
-        
-        for i, segment in enumerate(segments, 1):
-            start_time = self._format_srt_timestamp(segment['start'])
-            end_time = self._format_srt_timestamp(segment['end'])
-            
-            srt_content.append(f"{i}")
-            srt_content.append(f"{start_time} --> {end_time}")
-            srt_content.append(segment['text'])
-            srt_content.append("")  # Pusta linia
+        format_timestamp = self._format_srt_timestamp
         
-        return '\n'.join(srt_content)
+        # Pusta linia między napisami
+        entries = (
+            f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+            for i, (start, end, text) in enumerate(segments, 1)
+        )
+        return _concat(entries, "\n", streamed)
     
-    def _generate_vtt(self, segments: List[Dict[str, Any]]) -> str:
+    def _generate_vtt(self, segments: Iterable[SubtitleEntry], streamed: bool = False) -> str:
         """Generuj napisy w formacie VTT"""
-        vtt_content = ["WEBVTT", ""]
+        format_timestamp = self._format_vtt_timestamp
         
-        for segment in segments:
-            start_time = self._format_vtt_timestamp(segment['start'])
-            end_time = self._format_vtt_timestamp(segment['end'])
-            
-            vtt_content.append(f"{start_time} --> {end_time}")
-            vtt_content.append(segment['text'])
-            vtt_content.append("")  # Pusta linia
-        
-        return '\n'.join(vtt_content)
+        # Pusta linia przed każdym wpisem
+        entries = (
+            f"\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+            for start, end, text in segments
+        )
+        return _concat(chain(("WEBVTT\n",), entries), streamed=streamed)
     
-    def _generate_ass(self, segments: List[Dict[str, Any]]) -> str:
+    def _generate_ass(self, segments: Iterable[SubtitleEntry], streamed: bool = False) -> str:
         """Generuj napisy w formacie ASS"""
-        ass_header = """[Script Info]
-Title: Generated Subtitles
-ScriptType: v4.00+
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,2,0,2,10,10,10,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-        
-        ass_content = [ass_header]
+        format_timestamp = self._format_ass_timestamp
         
-        for segment in segments:
-            start_time = self._format_ass_timestamp(segment['start'])
-            end_time = self._format_ass_timestamp(segment['end'])
-            
-            ass_content.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{segment['text']}")
-        
-        return '\n'.join(ass_content)
+        entries = (
+            f"\nDialogue: 0,{format_timestamp(start)},{format_timestamp(end)},Default,,0,0,0,,{text}"
+            for start, end, text in segments
+        )
+        return _concat(chain((_ASS_HEADER,), entries), streamed=streamed)
     
     def _format_srt_timestamp(self, seconds: float) -> str:
         """Formatuj timestamp dla SRT (HH:MM:SS,mmm)"""
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
-        milliseconds = int((seconds - total_seconds) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+        return _ms_timestamp(int(seconds * 1000 + _UNIT_EPS), ',')
     
     def _format_vtt_timestamp(self, seconds: float) -> str:
         """Formatuj timestamp dla VTT (HH:MM:SS.mmm)"""
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
-        milliseconds = int((seconds - total_seconds) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+        return _ms_timestamp(int(seconds * 1000 + _UNIT_EPS), '.')
     
     def _format_ass_timestamp(self, seconds: float) -> str:
         """Formatuj timestamp dla ASS (H:MM:SS.cc)"""
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
-        centiseconds = int((seconds - total_seconds) * 100)
-        
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
\ No newline at end of file
+        return _cs_timestamp(int(seconds * 100 + _UNIT_EPS))
@@ -5,13 +5,42 @@ Debugger timestampów - diagnozuje i naprawia problemy z synchronizacją
 import os
 import subprocess
 import json
-from typing import Dict, Any, List, Tuple
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
 
+from ..utils.jit import njit
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+@njit(cache=True)
+def _scan_words(starts: np.ndarray, ends: np.ndarray) -> Tuple[int, int, int]:
+    """
+    Policz bardzo krótkie (< 50ms), bardzo długie (> 3s) i nakładające się słowa
+    
+    Args:
+        starts: Czasy rozpoczęcia słów
+        ends: Czasy zakończenia słów
+        
+    Returns:
+        Tuple (bardzo krótkie, bardzo długie, nakładające się na następne)
+    """
+    n = starts.shape[0]
+    very_short = 0
+    very_long = 0
+    overlapping = 0
+    for i in range(n):
+        duration = ends[i] - starts[i]
+        if duration < 0.05:
+            very_short += 1
+        if duration > 3.0:
+            very_long += 1
+        if i < n - 1 and ends[i] > starts[i + 1]:
+            overlapping += 1
+    return very_short, very_long, overlapping
+
 @dataclass
 class TimestampIssue:
     """Problem z timestampem"""
@@ -26,6 +55,9 @@ class TimestampDebugger:
     def __init__(self):
         self.issues_found = []
         
+        # Wyniki ffprobe (format + strumienie) per (ścieżka, czas modyfikacji)
+        self._probe_cache: Dict[Tuple[str, Optional[float]], Optional[Dict[str, Any]]] = {}
+        
     def diagnose_timestamp_issues(self, video_path: str, audio_path: str, transcript_data: Dict) -> List[TimestampIssue]:
         """
         Zdiagnozuj problemy z timestampami
@@ -42,6 +74,9 @@ class TimestampDebugger:
         
         logger.info("🔍 Diagnozowanie problemów z timestampami...")
         
+        # Wywołania ffprobe dla wideo i audio równolegle - sprawdzenia poniżej czytają z cache
+        self._prefetch_probes(video_path, audio_path)
+        
         # 1. Sprawdź długość plików
         self._check_file_durations(video_path, audio_path, transcript_data)
         
@@ -97,18 +132,67 @@ class TimestampDebugger:
         except Exception as e:
             logger.error(f"Błąd sprawdzania długości: {e}")
     
+    def _prefetch_probes(self, *paths: str):
+        """
+        Zbadaj istniejące pliki równolegle (ffprobe zwalnia GIL na czas procesu)
+        
+        Błędy nie są tu raportowane - sprawdzenie, które potrzebuje danego
+        pliku, ponowi wywołanie i zaloguje błąd we własnym kontekście.
+        
+        Args:
+            paths: Ścieżki do plików multimedialnych
+        """
+        paths = [path for path in dict.fromkeys(paths) if os.path.exists(path)]
+        if len(paths) < 2:
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            futures = [executor.submit(self._probe, path) for path in paths]
+        
+        for path, future in zip(paths, futures):
+            if future.exception() is not None:
+                logger.debug(f"Wstępne ffprobe nie powiodło się dla {path}: {future.exception()}")
+    
+    def _probe(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Uruchom ffprobe raz na plik (format i strumienie razem) i zapamiętaj wynik
+        
+        Kolejne sprawdzenia tego samego pliku (długość, parametry audio, ścieżki
+        A/V) korzystają z jednego wywołania. Klucz zawiera czas modyfikacji,
+        więc nadpisany plik jest badany ponownie.
+        
+        Args:
+            file_path: Ścieżka do pliku multimedialnego
+            
+        Returns:
+            Sparsowany JSON z ffprobe lub None, gdy ffprobe zakończył się błędem
+        """
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            mtime = None
+        
+        key = (file_path, mtime)
+        if key in self._probe_cache:
+            return self._probe_cache[key]
+        
+        cmd = [
+            'ffprobe', '-v', 'quiet', '-print_format', 'json',
+            '-show_format', '-show_streams', file_path
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        data = json.loads(result.stdout) if result.returncode == 0 else None
+        
+        self._probe_cache[key] = data
+        return data
+    
     def _get_media_duration(self, file_path: str) -> float:
         """Pobierz długość pliku multimedialnego"""
         try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', file_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            data = self._probe(file_path)
             
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
+            if data is not None:
                 duration = float(data['format']['duration'])
                 return duration
             else:
@@ -184,28 +268,12 @@ class TimestampDebugger:
     def _check_word_timestamps(self, words: List[Dict]):
         """Sprawdź jakość word-level timestamps"""
         
-        very_short_words = 0
-        very_long_words = 0
-        overlapping_words = 0
+        # Czasy słów jako tablice - statystyki liczone w skompilowanej pętli
+        n = len(words)
+        starts = np.fromiter((word.get('start', 0) for word in words), dtype=np.float64, count=n)
+        ends = np.fromiter((word.get('end', 0) for word in words), dtype=np.float64, count=n)
         
-        for i, word in enumerate(words):
-            start = word.get('start', 0)
-            end = word.get('end', 0)
-            duration = end - start
-            
-            # Bardzo krótkie słowa
-            if duration < 0.05:  # < 50ms
-                very_short_words += 1
-            
-            # Bardzo długie słowa
-            if duration > 3.0:  # > 3s
-                very_long_words += 1
-            
-            # Nakładanie z następnym słowem
-            if i < len(words) - 1:
-                next_start = words[i + 1].get('start', 0)
-                if end > next_start:
-                    overlapping_words += 1
+        very_short_words, very_long_words, overlapping_words = _scan_words(starts, ends)
         
         # Raportuj problemy
         if very_short_words > len(words) * 0.1:  # > 10% słów
@@ -246,19 +314,12 @@ class TimestampDebugger:
         
         # Sprawdź czy audio ma odpowiednią jakość
         try:
-            # Sprawdź parametry audio
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_streams', '-select_streams', 'a:0', audio_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            # Sprawdź parametry audio (pierwszy strumień audio)
+            data = self._probe(audio_path)
             
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                if 'streams' in data and data['streams']:
-                    audio_stream = data['streams'][0]
-                    
+            if data is not None:
+                audio_stream = next((stream for stream in data.get('streams', []) if stream.get('codec_type') == 'audio'), None)
+                if audio_stream is not None:
                     sample_rate = int(audio_stream.get('sample_rate', 0))
                     channels = int(audio_stream.get('channels', 0))
                     
@@ -290,16 +351,9 @@ class TimestampDebugger:
         # To jest zaawansowana analiza - na razie podstawowa implementacja
         try:
             # Sprawdź czy video ma audio track
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_streams', video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            data = self._probe(video_path)
             
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                
+            if data is not None:
                 has_video = False
                 has_audio = False
                 
@@ -335,31 +389,33 @@ class TimestampDebugger:
         if not segments:
             return
         
-        # Sprawdź rozkład długości segmentów
-        durations = [seg.get('end', 0) - seg.get('start', 0) for seg in segments]
+        # Sprawdź rozkład długości segmentów - jedno przejście bez list pośrednich
+        short_segments = 0
+        long_segments = 0
+        for seg in segments:
+            duration = seg.get('end', 0) - seg.get('start', 0)
+            if duration < 0.5:
+                short_segments += 1
+            elif duration > 10.0:
+                long_segments += 1
+        
+        # Bardzo krótkie segmenty
+        if short_segments > len(segments) * 0.3:  # > 30%
+            self.issues_found.append(TimestampIssue(
+                issue_type="many_short_segments",
+                description=f"{short_segments} bardzo krótkich segmentów (< 0.5s)",
+                severity="medium",
+                suggested_fix="Połącz krótkie segmenty"
+            ))
         
-        if durations:
-            avg_duration = sum(durations) / len(durations)
-            
-            # Bardzo krótkie segmenty
-            short_segments = len([d for d in durations if d < 0.5])
-            if short_segments > len(segments) * 0.3:  # > 30%
-                self.issues_found.append(TimestampIssue(
-                    issue_type="many_short_segments",
-                    description=f"{short_segments} bardzo krótkich segmentów (< 0.5s)",
-                    severity="medium",
-                    suggested_fix="Połącz krótkie segmenty"
-                ))
-            
-            # Bardzo długie segmenty
-            long_segments = len([d for d in durations if d > 10.0])
-            if long_segments > 0:
-                self.issues_found.append(TimestampIssue(
-                    issue_type="very_long_segments",
-                    description=f"{long_segments} bardzo długich segmentów (> 10s)",
-                    severity="low",
-                    suggested_fix="Podziel długie segmenty"
-                ))
+        # Bardzo długie segmenty
+        if long_segments > 0:
+            self.issues_found.append(TimestampIssue(
+                issue_type="very_long_segments",
+                description=f"{long_segments} bardzo długich segmentów (> 10s)",
+                severity="low",
+                suggested_fix="Podziel długie segmenty"
+            ))
     
     def get_suggested_fixes(self) -> List[str]:
         """Pobierz sugerowane poprawki"""
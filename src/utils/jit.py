@@ -0,0 +1,14 @@
+"""
+Opcjonalna kompilacja JIT (Numba) dla kerneli numerycznych
+"""
+
+try:
+    from numba import njit
+except ImportError:  # Numba opcjonalna - kernele działają wtedy jako zwykły Python
+    def njit(*args, **kwargs):
+        """Zastępczy dekorator - zwraca funkcję bez zmian (@njit i @njit(...))"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+__all__ = ['njit']